@@ -2,24 +2,60 @@
 # /// script
 # requires-python = ">=3.11"
 # dependencies = [
-#     "httpx>=0.27.0",
+#     "brotli>=1.1.0",
+#     "httpx[http2]>=0.27.0",
+#     "orjson>=3.9.0",
 # ]
 # ///
 
 import argparse
+import asyncio
+import atexit
+import functools
+import hashlib
+import importlib.util
 import json
 import os
 import sys
 import time
-from typing import Any, Dict, Iterable, List, Tuple
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Tuple
 
 import httpx
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson pays off on large response bodies; for the tiny --params-json
+# payload ujson is the cheaper parser when present, stdlib json otherwise.
+try:
+    from ujson import loads as _loads_small
+except ImportError:
+    from json import loads as _loads_small
+
 API_BASE_URL = "https://api.search.brave.com"
 ENDPOINT_PATHS = {
     "web": "/res/v1/web/search",
     "summarizer": "/res/v1/summarizer/search",
 }
+ENDPOINT_URLS = {
+    endpoint: f"{API_BASE_URL}{path}" for endpoint, path in ENDPOINT_PATHS.items()
+}
+# httpx advertises br/zstd in Accept-Encoding by itself when their decoders
+# are installed, and negotiates HTTP/2 via ALPN when h2 is available.
+CLIENT_HEADERS = {"Accept": "application/json"}
+CLIENT_HTTP2 = importlib.util.find_spec("h2") is not None
+CLIENT_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+CLIENT_TIMEOUT = 30.0
+CACHE_DIR = Path.home() / ".cache" / "brave-search"
+CACHE_MAX_ENTRIES = 256
+WEB_CACHE_TTL = 300.0
+SUMMARIZER_CACHE_TTL = 60.0
+# Shared read-only fallbacks for missing sections, so lookups allocate nothing.
+EMPTY_MAPPING: Mapping[str, Any] = MappingProxyType({})
 
 
 class BraveSearchError(Exception):
@@ -30,6 +66,7 @@ class BraveSearchError(Exception):
         self.details = details
 
 
+@functools.lru_cache(maxsize=1)
 def _load_api_key() -> str:
     key = os.getenv("BRAVE_SEARCH_API_KEY")
     if not key:
@@ -40,8 +77,103 @@ def _load_api_key() -> str:
     return key
 
 
-def _bool_to_string(value: bool) -> str:
-    return "true" if value else "false"
+@functools.lru_cache(maxsize=1)
+def _auth_headers() -> Dict[str, str]:
+    return {"X-Subscription-Token": _load_api_key()}
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client() -> httpx.Client:
+    client = httpx.Client(
+        headers=CLIENT_HEADERS,
+        http2=CLIENT_HTTP2,
+        limits=CLIENT_LIMITS,
+        timeout=CLIENT_TIMEOUT,
+    )
+    atexit.register(client.close)
+    return client
+
+
+def _json_loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _print_json(result: Dict[str, Any]) -> None:
+    if orjson is None:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+    sys.stdout.flush()
+    sys.stdout.buffer.write(
+        orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    )
+    sys.stdout.buffer.flush()
+
+
+def _json_dumps(result: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(result)
+    return json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+
+def _cache_path(namespace: str, query_items: Iterable[Tuple[str, str]]) -> Path:
+    key = json.dumps(sorted(query_items), ensure_ascii=False)
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return CACHE_DIR / namespace / f"{digest}.json"
+
+
+def _cache_load(path: Path, ttl: float) -> Dict[str, Any] | None:
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        return _json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_store(path: Path, result: Dict[str, Any]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(_json_dumps(result))
+        os.replace(tmp_path, path)
+        entries = sorted(path.parent.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for stale in entries[:-CACHE_MAX_ENTRIES]:
+            stale.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def _new_async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        headers=CLIENT_HEADERS,
+        http2=CLIENT_HTTP2,
+        limits=CLIENT_LIMITS,
+        timeout=CLIENT_TIMEOUT,
+    )
+
+
+def _bool_to_string(value: Any) -> str:
+    return ("false", "true")[bool(value)]
+
+
+WEB_QUERY_FIELDS: Tuple[Tuple[str, Callable[[Any], str]], ...] = (
+    ("country", str),
+    ("search_lang", str),
+    ("ui_lang", str),
+    ("safesearch", str),
+    ("freshness", str),
+    ("units", str),
+    ("count", str),
+    ("offset", str),
+    ("text_decorations", _bool_to_string),
+    ("spellcheck", _bool_to_string),
+    ("extra_snippets", _bool_to_string),
+)
+
+
+GOGGLES_URL_PREFIX = "https://"
 
 
 def _normalize_list(value: Any) -> List[str]:
@@ -70,35 +202,20 @@ def _build_web_query_params(params: Dict[str, Any]) -> List[Tuple[str, str]]:
         if filters:
             items.append(("result_filter", ",".join(filters)))
 
-    goggles = _normalize_list(params.get("goggles"))
-    for goggle in goggles:
-        if goggle.startswith("https://"):
-            items.append(("goggles", goggle))
-
-    direct_fields = [
-        "country",
-        "search_lang",
-        "ui_lang",
-        "safesearch",
-        "freshness",
-        "units",
-        "count",
-        "offset",
-    ]
-    bool_fields = ["text_decorations", "spellcheck", "extra_snippets"]
-
-    for field in direct_fields:
-        value = params.get(field)
-        if value is None:
-            continue
-        items.append((field, str(value)))
-
-    for field in bool_fields:
-        value = params.get(field)
-        if value is None:
-            continue
-        items.append((field, _bool_to_string(bool(value))))
+    goggles = params.get("goggles")
+    if goggles is not None:
+        items.extend(
+            ("goggles", goggle)
+            for goggle in _normalize_list(goggles)
+            if goggle.startswith(GOGGLES_URL_PREFIX)
+        )
 
+    get = params.get
+    items.extend(
+        (field, convert(value))
+        for field, convert in WEB_QUERY_FIELDS
+        if (value := get(field)) is not None
+    )
     return items
 
 
@@ -113,136 +230,199 @@ def _build_summarizer_query_params(
     inline_refs = bool(params.get("inline_references", False))
     query_items = [
         ("key", key.strip()),
-        ("entity_info", _bool_to_string(bool(params.get("entity_info", False)))),
+        ("entity_info", _bool_to_string(params.get("entity_info", False))),
         ("inline_references", _bool_to_string(inline_refs)),
     ]
     return query_items, inline_refs
 
 
-def issue_request(
-    endpoint: str, query_items: Iterable[Tuple[str, str]]
-) -> Dict[str, Any]:
-    if endpoint not in ENDPOINT_PATHS:
+def _request_url_and_headers(endpoint: str) -> Tuple[str, Dict[str, str]]:
+    url = ENDPOINT_URLS.get(endpoint)
+    if url is None:
         raise BraveSearchError(f"Unsupported endpoint '{endpoint}'.")
-    api_key = _load_api_key()
-    url = f"{API_BASE_URL}{ENDPOINT_PATHS[endpoint]}"
-    headers = {
-        "Accept": "application/json",
-        "Accept-Encoding": "gzip",
-        "X-Subscription-Token": api_key,
-    }
-    try:
-        response = httpx.get(
-            url, headers=headers, params=list(query_items), timeout=30.0
-        )
-    except httpx.HTTPError as exc:
-        raise BraveSearchError(
-            "Failed to reach Brave API.", details={"error": str(exc)}
-        ) from exc
+    return url, _auth_headers()
+
 
+def _parse_response(
+    response: httpx.Response, *, required: bytes | None = None
+) -> Dict[str, Any] | None:
     if response.status_code // 100 != 2:
         try:
-            payload = response.json()
+            payload = _json_loads(response.content)
         except ValueError:
             payload = response.text
         raise BraveSearchError(
             f"Brave API responded with status {response.status_code}.",
             details=payload,
         )
+    raw = response.content
+    if required is not None and required not in raw:
+        return None
     try:
-        return response.json()
+        return _json_loads(raw)
     except ValueError as exc:
         raise BraveSearchError("Brave API returned invalid JSON.") from exc
 
 
+def issue_request(
+    endpoint: str, query_items: Iterable[Tuple[str, str]]
+) -> Dict[str, Any]:
+    url, headers = _request_url_and_headers(endpoint)
+    try:
+        response = _get_client().get(url, headers=headers, params=list(query_items))
+    except httpx.HTTPError as exc:
+        raise BraveSearchError(
+            "Failed to reach Brave API.", details={"error": str(exc)}
+        ) from exc
+    return _parse_response(response)
+
+
+async def _issue_request_async(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    query_items: Iterable[Tuple[str, str]],
+    *,
+    required: bytes | None = None,
+) -> Dict[str, Any] | None:
+    url, headers = _request_url_and_headers(endpoint)
+    try:
+        response = await client.get(url, headers=headers, params=list(query_items))
+    except httpx.HTTPError as exc:
+        raise BraveSearchError(
+            "Failed to reach Brave API.", details={"error": str(exc)}
+        ) from exc
+    return _parse_response(response, required=required)
+
+
 def _format_web_results(section: Dict[str, Any]) -> List[Dict[str, Any]]:
-    results = []
-    for item in section.get("results", []) or []:
-        results.append(
-            {
-                "url": item.get("url"),
-                "title": item.get("title"),
-                "description": item.get("description"),
-                "extra_snippets": item.get("extra_snippets"),
-            }
-        )
-    return results
+    return [
+        {
+            "url": item.get("url"),
+            "title": item.get("title"),
+            "description": item.get("description"),
+            "extra_snippets": item.get("extra_snippets"),
+        }
+        for item in section.get("results") or ()
+    ]
 
 
 def _format_faq_results(section: Dict[str, Any]) -> List[Dict[str, Any]]:
-    results = []
-    for item in section.get("results", []) or []:
-        results.append(
-            {
-                "question": item.get("question"),
-                "answer": item.get("answer"),
-                "title": item.get("title"),
-                "url": item.get("url"),
-            }
-        )
-    return results
+    return [
+        {
+            "question": item.get("question"),
+            "answer": item.get("answer"),
+            "title": item.get("title"),
+            "url": item.get("url"),
+        }
+        for item in section.get("results") or ()
+    ]
 
 
 def _format_discussion_results(section: Dict[str, Any]) -> List[Dict[str, Any]]:
     mutated = section.get("mutated_by_goggles")
-    results = []
-    for item in section.get("results", []) or []:
-        results.append(
-            {
-                "mutated_by_goggles": mutated,
-                "url": item.get("url"),
-                "data": item.get("data"),
-            }
-        )
-    return results
+    return [
+        {
+            "mutated_by_goggles": mutated,
+            "url": item.get("url"),
+            "data": item.get("data"),
+        }
+        for item in section.get("results") or ()
+    ]
 
 
 def _format_news_results(section: Dict[str, Any]) -> List[Dict[str, Any]]:
     mutated = section.get("mutated_by_goggles")
-    results = []
-    for item in section.get("results", []) or []:
-        results.append(
-            {
-                "mutated_by_goggles": mutated,
-                "source": item.get("source"),
-                "breaking": item.get("breaking"),
-                "is_live": item.get("is_live"),
-                "age": item.get("age"),
-                "url": item.get("url"),
-                "title": item.get("title"),
-                "description": item.get("description"),
-                "extra_snippets": item.get("extra_snippets"),
-            }
-        )
-    return results
+    return [
+        {
+            "mutated_by_goggles": mutated,
+            "source": item.get("source"),
+            "breaking": item.get("breaking"),
+            "is_live": item.get("is_live"),
+            "age": item.get("age"),
+            "url": item.get("url"),
+            "title": item.get("title"),
+            "description": item.get("description"),
+            "extra_snippets": item.get("extra_snippets"),
+        }
+        for item in section.get("results") or ()
+    ]
+
+
+def _format_video_result(item: Dict[str, Any], mutated: Any) -> Dict[str, Any]:
+    video_data = item.get("video") or EMPTY_MAPPING
+    return {
+        "mutated_by_goggles": mutated,
+        "url": item.get("url"),
+        "title": item.get("title"),
+        "description": item.get("description"),
+        "age": item.get("age"),
+        "thumbnail_url": (item.get("thumbnail") or EMPTY_MAPPING).get("src"),
+        "duration": video_data.get("duration"),
+        "view_count": video_data.get("views"),
+        "creator": video_data.get("creator"),
+        "publisher": video_data.get("publisher"),
+        "tags": video_data.get("tags"),
+    }
 
 
 def _format_video_results(section: Dict[str, Any]) -> List[Dict[str, Any]]:
     mutated = section.get("mutated_by_goggles")
-    results = []
-    for item in section.get("results", []) or []:
-        video_data = item.get("video", {}) or {}
-        results.append(
-            {
-                "mutated_by_goggles": mutated,
-                "url": item.get("url"),
-                "title": item.get("title"),
-                "description": item.get("description"),
-                "age": item.get("age"),
-                "thumbnail_url": (item.get("thumbnail") or {}).get("src"),
-                "duration": video_data.get("duration"),
-                "view_count": video_data.get("views"),
-                "creator": video_data.get("creator"),
-                "publisher": video_data.get("publisher"),
-                "tags": video_data.get("tags"),
-            }
-        )
-    return results
+    return [
+        _format_video_result(item, mutated) for item in section.get("results") or ()
+    ]
 
 
-def run_web_search(params: Dict[str, Any]) -> Dict[str, Any]:
+def _format_section(
+    response: Dict[str, Any],
+    name: str,
+    formatter: Callable[[Dict[str, Any]], List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    section = response.get(name)
+    if not section or not section.get("results"):
+        return []
+    return formatter(section)
+
+
+EXTRA_SECTIONS: Dict[
+    str, Tuple[str, Callable[[Dict[str, Any]], List[Dict[str, Any]]]]
+] = {
+    "faq": ("faq_results", _format_faq_results),
+    "discussions": ("discussions_results", _format_discussion_results),
+    "news": ("news_results", _format_news_results),
+    "videos": ("video_results", _format_video_results),
+}
+
+
+def _parse_sections(params: Dict[str, Any]) -> Tuple[str, ...]:
+    sections = params.get("sections")
+    if sections is None:
+        return tuple(EXTRA_SECTIONS)
+    names = set(_normalize_list(sections))
+    unknown = names - {"web", *EXTRA_SECTIONS}
+    if unknown:
+        raise ValueError(f"Unknown `sections` value(s): {', '.join(sorted(unknown))}.")
+    return tuple(name for name in EXTRA_SECTIONS if name in names)
+
+
+def _format_extra_sections(
+    response: Dict[str, Any], sections: Tuple[str, ...]
+) -> Dict[str, List[Dict[str, Any]]]:
+    formatted = {}
+    for name in sections:
+        key, formatter = EXTRA_SECTIONS[name]
+        formatted[key] = _format_section(response, name, formatter)
+    return formatted
+
+
+def run_web_search(params: Dict[str, Any], *, use_cache: bool = True) -> Dict[str, Any]:
     try:
         query_items = _build_web_query_params(params)
+        sections = _parse_sections(params)
+        cache_path = _cache_path(
+            "web", [*query_items, ("sections", ",".join(sections))]
+        )
+        if use_cache and (cached := _cache_load(cache_path, WEB_CACHE_TTL)):
+            return cached
         response = issue_request("web", query_items)
     except ValueError as exc:
         return {"ok": False, "error": str(exc)}
@@ -252,8 +432,7 @@ def run_web_search(params: Dict[str, Any]) -> Dict[str, Any]:
             payload["details"] = exc.details
         return payload
 
-    web_section = response.get("web") or {}
-    web_results = _format_web_results(web_section)
+    web_results = _format_section(response, "web", _format_web_results)
 
     if not web_results:
         return {"ok": False, "error": "No web results found"}
@@ -261,15 +440,12 @@ def run_web_search(params: Dict[str, Any]) -> Dict[str, Any]:
     result_payload = {
         "ok": True,
         "web_results": web_results,
-        "faq_results": _format_faq_results(response.get("faq") or {}),
-        "discussions_results": _format_discussion_results(
-            response.get("discussions") or {}
-        ),
-        "news_results": _format_news_results(response.get("news") or {}),
-        "video_results": _format_video_results(response.get("videos") or {}),
-        "summarizer_key": (response.get("summarizer") or {}).get("key"),
+        **_format_extra_sections(response, sections),
+        "summarizer_key": (response.get("summarizer") or EMPTY_MAPPING).get("key"),
         "raw_query_info": response.get("query"),
     }
+    if use_cache:
+        _cache_store(cache_path, result_payload)
     return result_payload
 
 
@@ -281,43 +457,57 @@ def _flatten_summary(summary_items: List[Dict[str, Any]], inline_refs: bool) ->
         if entry_type == "token" and isinstance(data, str):
             parts.append(data)
         elif entry_type == "inline_reference" and inline_refs:
-            url = (data or {}).get("url")
+            url = (data or EMPTY_MAPPING).get("url")
             if url:
                 parts.append(f" ({url})")
     return "".join(parts).strip()
 
 
-def run_summarizer(params: Dict[str, Any]) -> Dict[str, Any]:
+async def _run_summarizer(
+    params: Dict[str, Any], *, use_cache: bool = True
+) -> Dict[str, Any]:
     try:
         query_items, inline_refs = _build_summarizer_query_params(params)
         poll_interval_ms = int(params.get("poll_interval_ms", 50))
+        max_poll_interval_ms = int(params.get("max_poll_interval_ms", 400))
         max_attempts = int(params.get("max_attempts", 20))
     except ValueError as exc:
         return {"ok": False, "error": str(exc)}
 
+    cache_path = _cache_path("summarizer", query_items)
+    if use_cache and (cached := _cache_load(cache_path, SUMMARIZER_CACHE_TTL)):
+        return cached
+
+    interval_ms = max(poll_interval_ms, 0)
+    max_interval_ms = max(max_poll_interval_ms, interval_ms)
     attempts = 0
     response: Dict[str, Any] | None = None
-    while attempts < max_attempts:
-        attempts += 1
-        try:
-            response = issue_request("summarizer", query_items)
-        except BraveSearchError as exc:
-            payload: Dict[str, Any] = {"ok": False, "error": str(exc)}
-            if exc.details is not None:
-                payload["details"] = exc.details
-            return payload
-
-        if response.get("status") == "complete":
-            break
-        time.sleep(max(poll_interval_ms, 0) / 1000.0)
-    else:
-        return {"ok": False, "error": "Unable to retrieve a Summarizer summary."}
-
-    summary_items = response.get("summary") or []
+    async with _new_async_client() as client:
+        while attempts < max_attempts:
+            attempts += 1
+            try:
+                # Pending polls are skipped without a JSON parse.
+                response = await _issue_request_async(
+                    client, "summarizer", query_items, required=b'"complete"'
+                )
+            except BraveSearchError as exc:
+                payload: Dict[str, Any] = {"ok": False, "error": str(exc)}
+                if exc.details is not None:
+                    payload["details"] = exc.details
+                return payload
+
+            if response is not None and response.get("status") == "complete":
+                break
+            await asyncio.sleep(interval_ms / 1000.0)
+            interval_ms = min(interval_ms * 2, max_interval_ms)
+        else:
+            return {"ok": False, "error": "Unable to retrieve a Summarizer summary."}
+
+    summary_items = response.get("summary") or ()
     if not summary_items:
         return {"ok": False, "error": "Unable to retrieve a Summarizer summary."}
 
-    return {
+    result_payload = {
         "ok": True,
         "summary_text": _flatten_summary(summary_items, inline_refs),
         "summary_raw": summary_items,
@@ -325,12 +515,19 @@ def run_summarizer(params: Dict[str, Any]) -> Dict[str, Any]:
         "followups": response.get("followups"),
         "entities_infos": response.get("entities_infos"),
     }
+    if use_cache:
+        _cache_store(cache_path, result_payload)
+    return result_payload
+
+
+def run_summarizer(params: Dict[str, Any], *, use_cache: bool = True) -> Dict[str, Any]:
+    return asyncio.run(_run_summarizer(params, use_cache=use_cache))
 
 
 def _parse_params_json(raw: str) -> Dict[str, Any]:
     try:
-        parsed = json.loads(raw)
-    except json.JSONDecodeError as exc:
+        parsed = _loads_small(raw)
+    except ValueError as exc:
         raise ValueError(f"Invalid JSON for --params-json: {exc}") from exc
     if not isinstance(parsed, dict):
         raise ValueError("--params-json must decode to a JSON object.")
@@ -348,6 +545,11 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         metavar="JSON",
         help="JSON object containing parameters for the requested operation.",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk cache of recent successful responses.",
+    )
     return parser
 
 
@@ -361,11 +563,11 @@ def main(argv: List[str]) -> int:
         return 1
 
     if args.mode == "web":
-        result = run_web_search(params)
+        result = run_web_search(params, use_cache=not args.no_cache)
     else:
-        result = run_summarizer(params)
+        result = run_summarizer(params, use_cache=not args.no_cache)
 
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    _print_json(result)
     return 0 if result.get("ok") else 1
 
 
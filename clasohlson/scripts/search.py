@@ -1,7 +1,7 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.10"
-# dependencies = ["httpx"]
+# dependencies = ["brotli", "httpx[http2]", "orjson"]
 # ///
 """Search products on clasohlson.com/fi/ via the Voyado Elevate (Apptus eSales) API.
 
@@ -15,13 +15,24 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import functools
+import importlib.util
 import json
 import sys
 import uuid
+from typing import TYPE_CHECKING
 from urllib.parse import quote, urlencode
 
 import httpx
 
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 API_BASE = "https://w76e66a6f.api.esales.apptus.cloud/api/v2/panels"
 
 DEFAULT_ATTRIBUTES = (
@@ -33,6 +44,20 @@ DEFAULT_ATTRIBUTES = (
 
 IMAGE_BASE = "https://images.clasohlson.com/medias"
 
+# One visitor identity per process, so repeated searches share a session.
+SESSION_KEY = uuid.uuid4().hex
+CUSTOMER_KEY = uuid.uuid4().hex
+
+
+@functools.cache
+def _get_client() -> httpx.Client:
+    """Return a process-wide client so repeated searches reuse the connection.
+
+    HTTP/2 is offered when ``h2`` is installed; httpx falls back to HTTP/1.1
+    if the server does not accept it during TLS negotiation.
+    """
+    return httpx.Client(http2=importlib.util.find_spec("h2") is not None, timeout=15)
+
 
 def search_products(
     query: str,
@@ -48,14 +73,11 @@ def search_products(
     category suggestions and more.  The ``product-suggestions`` sub-panel
     contains the actual search results.
     """
-    session_key = str(uuid.uuid4())
-    customer_key = str(uuid.uuid4())
-
     # Build URL manually to keep literal commas in search_attributes.
     params = {
         "esales.market": market,
-        "esales.sessionKey": session_key,
-        "esales.customerKey": customer_key,
+        "esales.sessionKey": SESSION_KEY,
+        "esales.customerKey": CUSTOMER_KEY,
         "esales.searchPhrase": query,
         "market": market,
         "search_prefix": query,
@@ -63,15 +85,48 @@ def search_products(
         "window_last": str(offset + limit - 1),
     }
     qs = urlencode(params, quote_via=quote)
-    qs += f"&search_attributes={attributes}"
-    url = f"{API_BASE}/search?{qs}"
+    url = f"{API_BASE}/search?{qs}&search_attributes={quote(attributes, safe=',')}"
 
-    resp = httpx.get(url, timeout=15)
+    resp = _get_client().get(url)
     if resp.status_code >= 500:
         resp.raise_for_status()
+    if orjson is not None:
+        return orjson.loads(resp.content)
     return resp.json()
 
 
+def _iter_panels(raw: dict) -> Iterator[dict]:
+    """Yield every panel from the list-valued sections of the API response.
+
+    Yields:
+        Panel dicts, in response order
+
+    """
+    for section in raw.values():
+        if isinstance(section, list):
+            yield from section
+
+
+def _panel_products(panel: dict) -> list[dict]:
+    """Flatten the product variants of one panel into attribute dicts."""
+    return [
+        {
+            "key": variant["key"],
+            **{
+                attr_name: values[0] if len(values) == 1 else values
+                for attr_name, values in variant.get("attributes", {}).items()
+            },
+        }
+        for product in panel.get("products", ())
+        for variant in product.get("variants", ())
+    ]
+
+
+def _panel_completions(panel: dict) -> list[str]:
+    """Return the non-empty autocomplete queries of one panel."""
+    return [q for c in panel.get("completions", ()) if (q := c.get("query", ""))]
+
+
 def extract_products(raw: dict, panel_name: str = "product-suggestions") -> list[dict]:
     """Extract a flat list of products from the API response.
 
@@ -80,37 +135,41 @@ def extract_products(raw: dict, panel_name: str = "product-suggestions") -> list
         panel_name: Which sub-panel to extract from.  ``product-suggestions``
             contains real search results; ``top-sellers`` contains popular items.
     """
-    products = []
-    for section in raw.values():
-        if not isinstance(section, list):
-            continue
-        for panel in section:
-            if panel.get("name") != panel_name:
-                continue
-            for product in panel.get("products", []):
-                for variant in product.get("variants", []):
-                    attrs = variant.get("attributes", {})
-                    item = {"key": variant["key"]}
-                    for attr_name, values in attrs.items():
-                        item[attr_name] = values[0] if len(values) == 1 else values
-                    products.append(item)
-    return products
+    return [
+        product
+        for panel in _iter_panels(raw)
+        if panel.get("name") == panel_name
+        for product in _panel_products(panel)
+    ]
 
 
 def extract_autocomplete(raw: dict) -> list[str]:
     """Extract autocomplete suggestions from the API response."""
+    return [
+        completion
+        for panel in _iter_panels(raw)
+        if panel.get("name") == "autocomplete"
+        for completion in _panel_completions(panel)
+    ]
+
+
+def extract_results(
+    raw: dict, panel_name: str = "product-suggestions"
+) -> tuple[list[dict], list[str]]:
+    """Extract products and autocomplete suggestions in a single pass.
+
+    Equivalent to calling :func:`extract_products` and
+    :func:`extract_autocomplete`, but walks the response only once.
+    """
+    products: list[dict] = []
     completions: list[str] = []
-    for section in raw.values():
-        if not isinstance(section, list):
-            continue
-        for panel in section:
-            if panel.get("name") != "autocomplete":
-                continue
-            for c in panel.get("completions", []):
-                q = c.get("query", "")
-                if q:
-                    completions.append(q)
-    return completions
+    for panel in _iter_panels(raw):
+        name = panel.get("name")
+        if name == panel_name:
+            products.extend(_panel_products(panel))
+        if name == "autocomplete":
+            completions.extend(_panel_completions(panel))
+    return products, completions
 
 
 def format_product(p: dict, idx: int) -> str:
@@ -164,16 +223,22 @@ def main() -> None:
     )
 
     if args.output_json:
-        json.dump(raw, sys.stdout, ensure_ascii=False, indent=2)
-        print()
+        if orjson is not None:
+            sys.stdout.buffer.write(
+                orjson.dumps(
+                    raw, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+                )
+            )
+        else:
+            json.dump(raw, sys.stdout, ensure_ascii=False, indent=2)
+            print()
         return
 
-    products = extract_products(raw)
+    products, completions = extract_results(raw)
     if not products:
         print(f"No results for '{args.query}'.")
         return
 
-    completions = extract_autocomplete(raw)
     if completions:
         print(f"Autocomplete: {', '.join(completions)}")
         print()
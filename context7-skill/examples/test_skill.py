@@ -11,6 +11,12 @@ import json
 import subprocess
 import sys
 
+# ujson parses small payloads like the batch output faster than stdlib json.
+try:
+    from ujson import loads as loads_small
+except ImportError:
+    from json import loads as loads_small
+
 
 def run_command(cmd):
     """Run a command and return the result."""
@@ -25,27 +31,27 @@ def main():
     """Test the generated skill."""
     print("Testing generated skill...")
 
-    # Test listing tools
-    print("\n1. Listing available tools:")
-    tools_output = run_command(["./../executor.py", "--list"])
-    print(tools_output)
+    # List and describe all tools over a single executor run and MCP session
+    batch = [{"op": "list"}, {"op": "describe"}]
+    output = run_command(["./../executor.py", "--batch", json.dumps(batch)])
 
-    # Parse tools
     try:
-        tools = json.loads(tools_output)
-        if tools and len(tools) > 0:
-            first_tool = tools[0]["name"]
-
-            # Test describing a tool
-            print(f"\n2. Describing tool: {first_tool}")
-            describe_output = run_command(
-                ["./../executor.py", "--describe", first_tool]
-            )
-            print(describe_output)
-        else:
-            print("No tools found to test")
-    except json.JSONDecodeError:
-        print("Could not parse tools list")
+        tools, schemas = loads_small(output)
+    except ValueError:
+        print(output)
+        print("Could not parse batch output")
+        print("\nTest complete")
+        return
+
+    print("\n1. Listing available tools:")
+    print(json.dumps(tools, indent=2))
+
+    if schemas:
+        # Test describing a tool
+        print(f"\n2. Describing tool: {schemas[0]['name']}")
+        print(json.dumps(schemas[0], indent=2))
+    else:
+        print("No tools found to test")
 
     print("\nTest complete")
 
@@ -13,18 +13,58 @@ import asyncio
 import argparse
 import json
 import sys
+import time
+from contextlib import AsyncExitStack, suppress
 from pathlib import Path
+from types import TracebackType
 
 # Import mcp package
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.types import Tool
+
+# Cached tool schemas older than this are listed again from the server
+TOOLS_CACHE_TTL = 24 * 60 * 60
 
 
 class MCPExecutor:
-    """Execute MCP tool calls dynamically."""
+    """Execute MCP tool calls dynamically.
+
+    One server connection is opened on first use and reused by every
+    subsequent call until ``close()`` is awaited.  When ``config_path`` is
+    given, tool schemas are also cached next to it (``<config>.cache``) and
+    reused by later runs until the config file changes or the cache is older
+    than ``TOOLS_CACHE_TTL`` seconds.
+    """
 
-    def __init__(self, server_config):
+    def __init__(
+        self,
+        server_config: dict,
+        config_path: Path | None = None,
+        *,
+        use_cache: bool = True,
+    ) -> None:
+        """Store the server config; no connection is opened yet."""
         self.server_config = server_config
+        self.config_path = config_path
+        self.use_cache = use_cache
+        self._exit_stack: AsyncExitStack | None = None
+        self._session: ClientSession | None = None
+        self._tools_by_name: dict[str, dict] | None = None
+        self._tools_from_cache = False
+
+    async def __aenter__(self) -> "MCPExecutor":
+        """Return the executor; the connection is opened lazily."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Close the server connection."""
+        await self.close()
 
     def _get_server_params(self):
         """Get server parameters for connection."""
@@ -34,100 +74,280 @@ class MCPExecutor:
             env=self.server_config.get("env")
         )
 
-    async def list_tools(self):
-        """Get list of available tools."""
-        server_params = self._get_server_params()
+    async def _get_session(self) -> ClientSession:
+        """Return an initialized session, connecting on first use.
+
+        Returns:
+            The session shared by all calls on this executor
 
-        async with stdio_client(server_params) as (read_stream, write_stream):
-            async with ClientSession(read_stream, write_stream) as session:
+        """
+        if self._session is None:
+            exit_stack = AsyncExitStack()
+            try:
+                read_stream, write_stream = await exit_stack.enter_async_context(
+                    stdio_client(self._get_server_params())
+                )
+                session = await exit_stack.enter_async_context(
+                    ClientSession(read_stream, write_stream)
+                )
                 await session.initialize()
-                response = await session.list_tools()
-                return [
-                    {
-                        "name": tool.name,
-                        "description": tool.description
-                    }
-                    for tool in response.tools
-                ]
-
-    async def describe_tool(self, tool_name: str):
+            except BaseException:
+                await exit_stack.aclose()
+                raise
+            self._exit_stack = exit_stack
+            self._session = session
+        return self._session
+
+    async def close(self) -> None:
+        """Shut down the server connection if one was opened."""
+        if self._exit_stack is not None:
+            exit_stack = self._exit_stack
+            self._exit_stack = None
+            self._session = None
+            await exit_stack.aclose()
+
+    def _tools_cache_path(self) -> tuple[Path | None, int | None]:
+        """Return the tool cache file and the config mtime it is keyed on.
+
+        Returns:
+            Cache path and config mtime, or ``(None, None)`` without a config
+
+        """
+        if self.config_path is None:
+            return None, None
+        cache_path = self.config_path.with_name(self.config_path.name + ".cache")
+        return cache_path, self.config_path.stat().st_mtime_ns
+
+    def _load_tools_cache(self) -> list[dict] | None:
+        """Return cached tool schemas, or None if missing or stale.
+
+        Returns:
+            Tool schema dicts from the cache, or None on a miss
+
+        """
+        cache_path, config_mtime = self._tools_cache_path()
+        if cache_path is None or not self.use_cache:
+            return None
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cached, dict):
+            return None
+        if cached.get("config_mtime_ns") != config_mtime:
+            return None
+        cached_at = cached.get("cached_at")
+        if not isinstance(cached_at, (int, float)):
+            return None
+        if time.time() - cached_at > TOOLS_CACHE_TTL:
+            return None
+        return cached.get("tools")
+
+    def _store_tools_cache(self, tools: list[dict]) -> None:
+        """Persist tool schemas for later runs, ignoring write failures."""
+        cache_path, config_mtime = self._tools_cache_path()
+        if cache_path is None:
+            return
+        data = {
+            "config_mtime_ns": config_mtime,
+            "cached_at": time.time(),
+            "tools": tools,
+        }
+        with suppress(OSError):
+            cache_path.write_text(json.dumps(data), encoding="utf-8")
+
+    async def _fetch_tools(self, *, refresh: bool = False) -> None:
+        """Index tool schemas by name, listing them from the server if needed.
+
+        With ``refresh``, the cache is bypassed and rewritten.
+        """
+        tools = None if refresh else self._load_tools_cache()
+        self._tools_from_cache = tools is not None
+        if tools is None:
+            session = await self._get_session()
+            response = await session.list_tools()
+            tools = [self._tool_schema(tool) for tool in response.tools]
+            self._store_tools_cache(tools)
+        self._tools_by_name = {tool["name"]: tool for tool in tools}
+
+    async def _get_tools(self) -> dict[str, dict]:
+        """Return tool schemas by name, fetching them only once.
+
+        Returns:
+            Mapping of tool names to schema dicts
+
+        """
+        if self._tools_by_name is None:
+            await self._fetch_tools()
+        return self._tools_by_name
+
+    async def list_tools(self) -> list[dict]:
+        """Get list of available tools."""
+        return [
+            {
+                "name": tool["name"],
+                "description": tool["description"]
+            }
+            for tool in (await self._get_tools()).values()
+        ]
+
+    @staticmethod
+    def _tool_schema(tool: Tool) -> dict:
+        """Build the schema dict reported for a tool.
+
+        Returns:
+            Name, description and input schema of ``tool``
+
+        """
+        return {
+            "name": tool.name,
+            "description": tool.description,
+            "inputSchema": tool.inputSchema
+        }
+
+    async def describe_tool(self, tool_name: str) -> dict | None:
         """Get detailed schema for a specific tool."""
-        server_params = self._get_server_params()
+        tools = await self._get_tools()
+        if tool_name not in tools and self._tools_from_cache:
+            # The server may have gained the tool after the cache was written
+            await self._fetch_tools(refresh=True)
+            tools = self._tools_by_name
+        return tools.get(tool_name)
 
-        async with stdio_client(server_params) as (read_stream, write_stream):
-            async with ClientSession(read_stream, write_stream) as session:
-                await session.initialize()
-                response = await session.list_tools()
-                for tool in response.tools:
-                    if tool.name == tool_name:
-                        return {
-                            "name": tool.name,
-                            "description": tool.description,
-                            "inputSchema": tool.inputSchema
-                        }
-                return None
-
-    async def call_tool(self, tool_name: str, arguments: dict):
+    async def call_tool(self, tool_name: str, arguments: dict) -> list:
         """Execute a tool call."""
-        server_params = self._get_server_params()
+        session = await self._get_session()
+        response = await session.call_tool(tool_name, arguments)
+        return response.content
+
+    async def run_batch(self, ops: list[dict]) -> list:
+        """Run several operations over one session.
+
+        Each op is a dict with ``"op"`` set to ``"list"``, ``"describe"``
+        (``"tool"`` names the tool; omit it to describe every tool) or
+        ``"call"`` (with ``"tool"`` and optional ``"arguments"``).
+
+        Returns:
+            One result per op, in the same order as the ops
+
+        Raises:
+            ValueError: If an op is not one of the above
+
+        """
+        results = []
+        for op in ops:
+            kind = op.get("op")
+            if kind == "list":
+                results.append(await self.list_tools())
+            elif kind == "describe" and "tool" in op:
+                results.append(await self.describe_tool(op["tool"]))
+            elif kind == "describe":
+                results.append(list((await self._get_tools()).values()))
+            elif kind == "call":
+                content = await self.call_tool(op["tool"], op.get("arguments", {}))
+                results.append([_to_jsonable(item) for item in content])
+            else:
+                msg = f"Unknown batch op: {kind!r}"
+                raise ValueError(msg)
+        return results
+
+
+def _to_jsonable(item: object) -> object:
+    """Convert an MCP content item into plain JSON data.
+
+    Returns:
+        A pydantic model dump, the object's attributes, or ``item`` itself
+
+    """
+    if hasattr(item, "model_dump"):
+        return item.model_dump(mode="json", exclude_none=True)
+    return item.__dict__ if hasattr(item, "__dict__") else item
 
-        async with stdio_client(server_params) as (read_stream, write_stream):
-            async with ClientSession(read_stream, write_stream) as session:
-                await session.initialize()
-                response = await session.call_tool(tool_name, arguments)
-                return response.content
+
+def _print_schemas(schemas: list[dict]) -> None:
+    """Print one schema as an object, several as a JSON array."""
+    if len(schemas) == 1:
+        print(json.dumps(schemas[0], indent=2))
+    else:
+        print(json.dumps(schemas, indent=2))
+
+
+def _print_call_result(result: object) -> None:
+    """Print text content as is and anything else as JSON."""
+    if isinstance(result, list):
+        for item in result:
+            if hasattr(item, 'text'):
+                print(item.text)
+            else:
+                print(json.dumps(item.__dict__ if hasattr(item, '__dict__') else item, indent=2))
+    else:
+        print(json.dumps(result.__dict__ if hasattr(result, '__dict__') else result, indent=2))
 
 
 async def main():
     parser = argparse.ArgumentParser(description="MCP Skill Executor")
     parser.add_argument("--call", help="JSON tool call to execute")
-    parser.add_argument("--describe", help="Get tool schema")
+    parser.add_argument(
+        "--describe", nargs="+", metavar="TOOL", help="Get tool schema(s)"
+    )
     parser.add_argument("--list", action="store_true", help="List all tools")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached tool schemas and list them from the server",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="JSON",
+        help="JSON array of list/describe/call ops to run over one connection "
+        "('-' reads the array from stdin)",
+    )
 
     args = parser.parse_args()
 
+    if not (args.list or args.describe or args.call or args.batch):
+        parser.print_help()
+        return
+
     # Load server config
     config_path = Path(__file__).parent / "mcp-config.json"
     if not config_path.exists():
         print(f"Error: Configuration file not found: {config_path}", file=sys.stderr)
         sys.exit(1)
 
-    with open(config_path) as f:
-        config = json.load(f)
-
-    executor = MCPExecutor(config)
+    config = json.loads(config_path.read_text(encoding="utf-8"))
 
+    # All requested operations share a single server connection.
     try:
-        if args.list:
-            tools = await executor.list_tools()
-            print(json.dumps(tools, indent=2))
-
-        elif args.describe:
-            schema = await executor.describe_tool(args.describe)
-            if schema:
-                print(json.dumps(schema, indent=2))
-            else:
-                print(f"Tool not found: {args.describe}", file=sys.stderr)
-                sys.exit(1)
-
-        elif args.call:
-            call_data = json.loads(args.call)
-            result = await executor.call_tool(
-                call_data["tool"],
-                call_data.get("arguments", {})
-            )
-
-            # Format result
-            if isinstance(result, list):
-                for item in result:
-                    if hasattr(item, 'text'):
-                        print(item.text)
-                    else:
-                        print(json.dumps(item.__dict__ if hasattr(item, '__dict__') else item, indent=2))
-            else:
-                print(json.dumps(result.__dict__ if hasattr(result, '__dict__') else result, indent=2))
-        else:
-            parser.print_help()
+        async with MCPExecutor(
+            config, config_path=config_path, use_cache=not args.no_cache
+        ) as executor:
+            if args.batch:
+                ops = json.loads(sys.stdin.read() if args.batch == "-" else args.batch)
+                print(json.dumps(await executor.run_batch(ops), indent=2))
+
+            if args.list:
+                tools = await executor.list_tools()
+                print(json.dumps(tools, indent=2))
+
+            if args.describe:
+                schemas = []
+                for tool_name in args.describe:
+                    schema = await executor.describe_tool(tool_name)
+                    if not schema:
+                        print(f"Tool not found: {tool_name}", file=sys.stderr)
+                        sys.exit(1)
+                    schemas.append(schema)
+                _print_schemas(schemas)
+
+            if args.call:
+                call_data = json.loads(args.call)
+                result = await executor.call_tool(
+                    call_data["tool"],
+                    call_data.get("arguments", {})
+                )
+
+                _print_call_result(result)
 
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr)
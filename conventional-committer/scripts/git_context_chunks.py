@@ -3,12 +3,14 @@
 Helper script for the conventional-committer skill.
 
 Collect recent Git commit messages and staged changes, then emit them in
-chunks of up to 16384 characters.
+chunks of up to 16384 bytes.
 
 If the total output (recent commits + staged diff) fits within the limit,
 return a single chunk. Otherwise, split the output into multiple chunks,
 preferably at file boundaries in the staged diff, but split within a single
-file's diff when that file alone exceeds the limit.
+file's diff when that file alone exceeds the limit. Git output is handled as
+raw bytes, so the limit is measured in UTF-8 bytes and the selected chunk
+is written to stdout without re-encoding.
 
 Each invocation prints a single chunk and, when additional chunks exist,
 prints the exact command needed to retrieve the next chunk.
@@ -25,161 +27,501 @@ of the project code.
 from __future__ import annotations
 
 import argparse
+import hashlib
+import itertools
 import os
+import shutil
 import subprocess
 import sys
-from typing import List
+import tempfile
+from pathlib import Path
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+BYTE_LIMIT = 16384
+READ_SIZE = 1 << 16
+DIFF_FILE_PREFIX = b"diff --git "
+_DIFF_FILE_BOUNDARY = b"\n" + DIFF_FILE_PREFIX
+CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "conventional-committer"
+)
+
+
+# An absolute path lets subprocess use posix_spawn instead of fork + exec
+GIT = shutil.which("git") or "git"
+RECENT_COMMITS_ARGS = ["log", "-n5", "--format=commit %h%n%B%n--------------"]
+STAGED_DIFF_ARGS = ["diff", "--cached"]
+STAGED_HEADER = b"== Staged changes (git --no-pager diff --cached) ==\n"
+# These point Git at files that git_state_key does not look at, so any cached
+# output could be stale while they are set
+UNCACHEABLE_GIT_ENV = (
+    "GIT_DIR",
+    "GIT_COMMON_DIR",
+    "GIT_INDEX_FILE",
+    "GIT_WORK_TREE",
+    "GIT_OBJECT_DIRECTORY",
+    "GIT_ALTERNATE_OBJECT_DIRECTORIES",
+)
+
+
+def _start_git(
+    args: List[str], stderr: Union[int, IO[bytes]] = subprocess.PIPE
+) -> subprocess.Popen:
+    # --no-pager keeps Git from ever starting an interactive pager.  Our own
+    # descriptors are non-inheritable, so close_fds=False is safe and keeps
+    # the posix_spawn fast path available.
+    return subprocess.Popen(
+        [GIT, "--no-pager", *args],
+        stdout=subprocess.PIPE,
+        stderr=stderr,
+        close_fds=False,
+    )
 
-CHAR_LIMIT = 16384
 
+def _git_error(args: List[str], returncode: int, stderr: bytes) -> RuntimeError:
+    message = stderr.decode("utf-8", errors="replace").strip()
+    return RuntimeError(
+        f"git {' '.join(args)} failed with exit code {returncode}:\n{message}"
+    )
 
-def run_git_command(args: List[str]) -> str:
-    """Run a Git command with pager disabled and return stdout as text.
 
-    Raises RuntimeError on non-zero exit.
-    """
-    env = os.environ.copy()
-    # Ensure Git never invokes an interactive pager
-    env.setdefault("GIT_PAGER", "cat")
+def format_recent_commits(output: bytes) -> bytes:
+    """Return a formatted section from the output of ``RECENT_COMMITS_ARGS``."""
+    if not output.strip():
+        return b"== Recent commits (last 5) ==\n(no commits found)\n\n"
 
-    result = subprocess.run(
-        ["git", "--no-pager", *args],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        env=env,
-        check=False,
-    )
+    return b"== Recent commits (last 5) ==\n" + output.strip() + b"\n\n"
 
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"git {' '.join(args)} failed with exit code {result.returncode}:\n"
-            f"{result.stderr.strip()}"
-        )
 
-    return result.stdout
+def find_git_dir(start: Path) -> Optional[Path]:
+    """Locate the Git directory for ``start`` without spawning Git.
+
+    Handles both regular ``.git`` directories and ``.git`` files pointing
+    elsewhere (worktrees, submodules).  Returns None when no repository is
+    found or when ``GIT_DIR`` overrides discovery.
+    """
+    if os.environ.get("GIT_DIR"):
+        return None
+    for directory in (start, *start.parents):
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            content = dot_git.read_text(encoding="utf-8").strip()
+            if not content.startswith("gitdir:"):
+                return None
+            return (directory / content[len("gitdir:") :].strip()).resolve()
+    return None
+
+
+def _stat_key(path: Path) -> Tuple[int, int, int]:
+    try:
+        st = path.stat()
+    except OSError:
+        return (0, 0, 0)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
 
 
-def get_recent_commits() -> str:
-    """Return a formatted section with the 5 most recent commits.
+def git_state_key(git_dir: Path) -> str:
+    """Return a key that changes whenever HEAD, the index or config change.
 
-    Uses the format: git log -n5 --format="commit %h%n%B%n--------------"
+    Only file metadata is read, so computing the key is much cheaper than
+    running Git.
+    """
+    common_file = git_dir / "commondir"
+    common_dir = git_dir
+    if common_file.is_file():
+        common_dir = (
+            git_dir / common_file.read_text(encoding="utf-8").strip()
+        ).resolve()
+
+    head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    parts: list = [str(git_dir.resolve()), head]
+    if head.startswith("ref:"):
+        ref = head[len("ref:") :].strip()
+        parts.append(_stat_key(git_dir / ref))
+        parts.append(_stat_key(common_dir / ref))
+    parts.append(_stat_key(common_dir / "packed-refs"))
+    parts.append(_stat_key(git_dir / "index"))
+    parts.append(_stat_key(common_dir / "config"))
+
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def _cache_file(git_dir: Path, state_key: str) -> Path:
+    repo_key = hashlib.blake2b(
+        str(git_dir.resolve()).encode(), digest_size=8
+    ).hexdigest()
+    return CACHE_DIR / f"{repo_key}-{state_key}.txt"
+
+
+def _iter_bytes(stream: IO[bytes], tee: Optional[IO[bytes]] = None) -> Iterator[bytes]:
+    """Yield ``stream`` in ``READ_SIZE`` pieces, copying them to ``tee``."""
+    while True:
+        data = stream.read(READ_SIZE)
+        if not data:
+            return
+        if tee is not None:
+            try:
+                tee.write(data)
+            except OSError:
+                tee = None
+        yield data
+
+
+def _iter_cached_diff(cache: IO[bytes]) -> Iterator[bytes]:
+    with cache:
+        yield from _iter_bytes(cache)
+
+
+def load_cached_git_output(
+    cache_file: Path,
+) -> Optional[Tuple[bytes, Iterator[bytes]]]:
+    """Return cached recent commits and a diff stream, or None on a miss.
+
+    The cache file holds the length of the ``git log`` output on its first
+    line, followed by that output and the raw staged diff.
     """
-    format_str = "commit %h%n%B%n--------------"
-    output = run_git_command(["log", "-n5", f"--format={format_str}"])
+    try:
+        cache = cache_file.open("rb")
+    except OSError:
+        return None
+    try:
+        recent_length = int(cache.readline())
+        recent_output = cache.read(recent_length)
+    except (OSError, ValueError):
+        cache.close()
+        return None
+    if len(recent_output) != recent_length:
+        cache.close()
+        return None
+    return recent_output, _iter_cached_diff(cache)
+
+
+def _iter_staged_diff(
+    process: subprocess.Popen,
+    stderr_file: IO[bytes],
+    recent_output: bytes,
+    cache_file: Optional[Path],
+) -> Iterator[bytes]:
+    """Stream the staged diff from ``process``, teeing it to the cache.
+
+    Git writes its stderr to ``stderr_file`` rather than a pipe, so a
+    chatty stderr cannot block Git while stdout is being read.
+    """
+    tmp_file = None
+    tee = None
+    if cache_file is not None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            tee = tmp_file.open("wb")
+            tee.write(b"%d\n%s" % (len(recent_output), recent_output))
+        except OSError:
+            tee = None
 
-    if not output.strip():
-        return "== Recent commits (last 5) ==\n(no commits found)\n\n"
+    try:
+        yield from _iter_bytes(process.stdout, tee)
+        if process.wait() != 0:
+            stderr_file.seek(0)
+            raise _git_error(STAGED_DIFF_ARGS, process.returncode, stderr_file.read())
+        if tee is not None:
+            tee.close()
+            _replace_cache_file(tmp_file, cache_file)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        stderr_file.close()
+        if tee is not None:
+            tee.close()
+        if tmp_file is not None:
+            tmp_file.unlink(missing_ok=True)
+
+
+def _replace_cache_file(tmp_file: Path, cache_file: Path) -> None:
+    """Install a fresh cache entry, removing entries for older repo states."""
+    try:
+        repo_prefix = cache_file.name.split("-", 1)[0]
+        for stale in cache_file.parent.glob(f"{repo_prefix}-*"):
+            if not stale.name.startswith(cache_file.stem):
+                stale.unlink(missing_ok=True)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
 
-    return "== Recent commits (last 5) ==\n" + output.strip() + "\n\n"
 
+def current_cache_file() -> Optional[Path]:
+    """Return the cache file for the repository's current state, if any.
+
+    Caching is disabled while any of ``UNCACHEABLE_GIT_ENV`` is set.
+    """
+    if any(os.environ.get(name) for name in UNCACHEABLE_GIT_ENV):
+        return None
+    git_dir = find_git_dir(Path.cwd())
+    if git_dir is None:
+        return None
+    try:
+        return _cache_file(git_dir, git_state_key(git_dir))
+    except OSError:
+        return None
 
-def split_diff_by_file(diff_body: str) -> List[str]:
-    """Split a staged diff into blocks per file.
 
-    The input should be the raw output from:
-        git --no-pager diff --cached
+def get_git_outputs(cache_file: Optional[Path]) -> Tuple[bytes, Iterator[bytes]]:
+    """Return recent commits and an iterator over the raw staged diff text.
+
+    Paging through chunks re-runs this script against an unchanged
+    repository, so the raw Git output is cached in ``cache_file`` (see
+    ``current_cache_file``).  On a miss the diff is streamed from Git and
+    copied to the cache as it is read.
     """
-    blocks: List[str] = []
-    current: List[str] = []
+    if cache_file is not None:
+        cached = load_cached_git_output(cache_file)
+        if cached is not None:
+            return cached
+
+    # Start both processes before reading either so they run concurrently
+    log_process = _start_git(RECENT_COMMITS_ARGS)
+    diff_stderr = tempfile.TemporaryFile()
+    diff_process = _start_git(STAGED_DIFF_ARGS, stderr=diff_stderr)
+    recent_output, stderr = log_process.communicate()
+    if log_process.returncode != 0:
+        diff_process.kill()
+        diff_process.communicate()
+        diff_stderr.close()
+        raise _git_error(RECENT_COMMITS_ARGS, log_process.returncode, stderr)
+
+    return recent_output, _iter_staged_diff(
+        diff_process, diff_stderr, recent_output, cache_file
+    )
 
-    for line in diff_body.splitlines(keepends=True):
-        if line.startswith("diff --git "):
-            if current:
-                blocks.append("".join(current))
-                current = []
-        current.append(line)
 
+def _split_before_file_headers(data: bytes) -> List[bytes]:
+    """Split ``data`` before every line starting with ``diff --git ``.
+
+    The first element holds any text before the first header and may be
+    empty.  Staged diffs usually touch only a few files, so a plain
+    ``bytes.find`` loop beats running a regex over the whole text.
+    """
+    cuts = [0]
+    if data.startswith(DIFF_FILE_PREFIX):
+        cuts.append(0)
+    pos = data.find(_DIFF_FILE_BOUNDARY)
+    while pos != -1:
+        cuts.append(pos + 1)
+        pos = data.find(_DIFF_FILE_BOUNDARY, pos + 1)
+    cuts.append(len(data))
+    return [data[start:end] for start, end in zip(cuts, cuts[1:])]
+
+
+def _feed_diff_text(text: bytes, current: List[bytes]) -> List[bytes]:
+    parts = _split_before_file_headers(text)
+    if parts[0]:
+        current.append(parts[0])
+    completed: List[bytes] = []
+    for part in parts[1:]:
+        if current:
+            completed.append(b"".join(current))
+        current[:] = [part]
+    return completed
+
+
+def iter_diff_blocks(pieces: Iterable[bytes]) -> Iterator[bytes]:
+    """Split streamed diff text into per-file blocks as it arrives.
+
+    Yields one block per file, plus any text before the first file header,
+    while holding at most one file's diff in memory.
+    """
+    current: List[bytes] = []
+    # Pieces of a line that is still incomplete; joined only once its end
+    # arrives, so a long line spread over many pieces is copied once
+    pending: List[bytes] = []
+    for data in pieces:
+        cut = data.rfind(b"\n") + 1
+        if not cut:
+            pending.append(data)
+            continue
+        pending.append(data[:cut])
+        yield from _feed_diff_text(b"".join(pending), current)
+        pending = [data[cut:]]
+    yield from _feed_diff_text(b"".join(pending), current)
     if current:
-        blocks.append("".join(current))
+        yield b"".join(current)
 
-    return blocks
 
+def iter_segments(
+    recent_output: bytes, diff_pieces: Iterable[bytes]
+) -> Iterator[bytes]:
+    """Yield the logical output segments: history, diff header, file blocks."""
+    yield format_recent_commits(recent_output)
 
-def fine_grain_segments(segments: List[str], limit: int) -> List[str]:
-    """Ensure no segment is longer than limit, splitting on newlines when possible.
+    blocks = iter_diff_blocks(diff_pieces)
+    leading: List[bytes] = []
+    for block in blocks:
+        leading.append(block)
+        if block.strip():
+            yield STAGED_HEADER
+            yield from leading
+            yield from blocks
+            return
+    yield STAGED_HEADER + b"(no staged changes)\n"
 
-    This is used when a single file's diff (or another logical segment)
-    exceeds the limit; in that case, split the segment into multiple pieces,
-    trying to cut at newline boundaries while respecting the character limit.
-    """
-    fine: List[str] = []
 
+def iter_fine_segments(segments: Iterable[bytes], limit: int) -> Iterator[bytes]:
+    """Yield ``segments`` with any segment longer than ``limit`` split up."""
     for seg in segments:
         if len(seg) <= limit:
-            fine.append(seg)
+            yield seg
             continue
 
         start = 0
         while start < len(seg):
             end = min(start + limit, len(seg))
             # Prefer to cut at the last newline within the allowed window
-            newline_pos = seg.rfind("\n", start + 1, end)
+            newline_pos = seg.rfind(b"\n", start + 1, end)
             if newline_pos == -1 or newline_pos <= start:
                 cut = end
+                # Never cut inside a multi-byte UTF-8 sequence
+                while start + 1 < cut < len(seg) and seg[cut] & 0xC0 == 0x80:
+                    cut -= 1
             else:
                 cut = newline_pos + 1
 
-            fine.append(seg[start:cut])
+            yield seg[start:cut]
             start = cut
 
-    return fine
-
 
-def build_chunks(char_limit: int) -> List[str]:
-    """Build all output chunks within the given character limit."""
-    recent_section = get_recent_commits()
+def iter_chunks(byte_limit: int, cache_file: Optional[Path] = None) -> Iterator[bytes]:
+    """Yield output chunks within the given byte limit.
 
-    # Collect staged diff once, then structure it for chunking
-    raw_diff = run_git_command(["diff", "--cached"])
-
-    segments: List[str] = [recent_section]
-
-    if raw_diff.strip():
-        staged_header = "== Staged changes (git --no-pager diff --cached) ==\n"
-        segments.append(staged_header)
-        file_blocks = split_diff_by_file(raw_diff)
-        segments.extend(file_blocks)
+    If everything fits within the limit, a single chunk is yielded without
+    splitting the diff at all.  Otherwise the staged diff is consumed as a
+    stream, so only the chunk being packed and the current file's diff are
+    held in memory.  Segments are combined greedily, keeping file
+    boundaries when possible.
+    """
+    recent_output, diff_pieces = get_git_outputs(cache_file)
+    recent_section = format_recent_commits(recent_output)
+
+    # Read ahead only until the diff is known not to fit in one chunk
+    diff_pieces = iter(diff_pieces)
+    head: List[bytes] = []
+    budget = byte_limit - len(recent_section) - len(STAGED_HEADER)
+    head_len = 0
+    for data in diff_pieces:
+        head.append(data)
+        head_len += len(data)
+        if head_len > budget:
+            break
     else:
-        segments.append(
-            "== Staged changes (git --no-pager diff --cached) ==\n(no staged changes)\n"
-        )
-
-    full_text = "".join(segments)
+        raw_diff = b"".join(head)
+        staged = raw_diff if raw_diff.strip() else b"(no staged changes)\n"
+        full_text = recent_section + STAGED_HEADER + staged
+        if len(full_text) <= byte_limit:
+            yield full_text
+            return
+
+    fine_segments = iter_fine_segments(
+        iter_segments(recent_output, itertools.chain(head, diff_pieces)),
+        byte_limit,
+    )
 
-    # If everything fits within the limit, return a single chunk
-    if len(full_text) <= char_limit:
-        return [full_text]
+    current: List[bytes] = []
+    current_len = 0
+    for seg in fine_segments:
+        if current and current_len + len(seg) > byte_limit:
+            yield b"".join(current)
+            current = []
+            current_len = 0
+        current.append(seg)
+        current_len += len(seg)
 
-    # Otherwise, ensure individual segments do not exceed the limit, then
-    # combine them into chunks while keeping file boundaries when possible.
-    fine_segments = fine_grain_segments(segments, char_limit)
+    if current_len:
+        yield b"".join(current)
 
-    chunks: List[str] = []
-    current = ""
 
-    for seg in fine_segments:
-        if not current:
-            current = seg
-            continue
+def _chunks_cache_file(cache_file: Path, byte_limit: int) -> Path:
+    return cache_file.with_name(f"{cache_file.stem}-{byte_limit}.chunks")
 
-        if len(current) + len(seg) <= char_limit:
-            current += seg
-        else:
-            chunks.append(current)
-            current = seg
 
-    if current:
-        chunks.append(current)
+def load_cached_chunk(
+    chunks_file: Path, chunk_index: int
+) -> Optional[Tuple[Optional[bytes], int]]:
+    """Return a cached chunk and the total count, or None on a miss.
 
-    return chunks
+    Each chunk is stored as a decimal length line followed by its bytes, so
+    all other chunks are skipped with a seek.
+    """
+    selected = None
+    total = 0
+    try:
+        with chunks_file.open("rb") as f:
+            while header := f.readline():
+                size = int(header)
+                if total == chunk_index:
+                    selected = f.read(size)
+                    if len(selected) != size:
+                        return None
+                else:
+                    f.seek(size, os.SEEK_CUR)
+                total += 1
+    except (OSError, ValueError):
+        return None
+    if not total:
+        return None
+    return selected, total
+
+
+def _tee_chunks(chunks: Iterable[bytes], chunks_file: Path) -> Iterator[bytes]:
+    """Yield ``chunks`` while writing them to ``chunks_file`` for later pages."""
+    tmp_file = chunks_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        out = tmp_file.open("wb")
+    except OSError:
+        yield from chunks
+        return
+    try:
+        with out:
+            for chunk in chunks:
+                out.write(b"%d\n" % len(chunk))
+                out.write(chunk)
+                yield chunk
+        os.replace(tmp_file, chunks_file)
+    except OSError:
+        pass
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+
+def select_chunk(byte_limit: int, chunk_index: int) -> Tuple[Optional[bytes], int]:
+    """Return the chunk at ``chunk_index`` (or None) and the total chunk count.
+
+    Chunks computed for the current repository state and limit are cached,
+    so paging with ``--chunk-index`` does not need to run Git again.
+    Otherwise, other chunks are counted and discarded as they are produced.
+    """
+    cache_file = current_cache_file()
+    chunks: Iterable[bytes] = iter_chunks(byte_limit, cache_file)
+    if cache_file is not None:
+        chunks_file = _chunks_cache_file(cache_file, byte_limit)
+        cached = load_cached_chunk(chunks_file, chunk_index)
+        if cached is not None:
+            return cached
+        chunks = _tee_chunks(chunks, chunks_file)
+
+    selected = None
+    total = 0
+    for total, chunk in enumerate(chunks, start=1):
+        if total - 1 == chunk_index:
+            selected = chunk
+    return selected, total
 
 
 def main(argv: List[str]) -> int:
     parser = argparse.ArgumentParser(
         description=(
             "Collect recent commits and staged changes and emit them in chunks of "
-            f"up to {CHAR_LIMIT} characters."
+            f"up to {BYTE_LIMIT} bytes."
         )
     )
     parser.add_argument(
@@ -191,41 +533,45 @@ def main(argv: List[str]) -> int:
     parser.add_argument(
         "--limit",
         type=int,
-        default=CHAR_LIMIT,
-        help=f"Maximum characters per chunk (default: {CHAR_LIMIT}).",
+        default=BYTE_LIMIT,
+        help=f"Maximum bytes per chunk (default: {BYTE_LIMIT}).",
     )
 
     args = parser.parse_args(argv)
 
     try:
-        chunks = build_chunks(args.limit)
+        chunk, total = select_chunk(args.limit, args.chunk_index)
     except RuntimeError as exc:
         print(str(exc), file=sys.stderr)
         return 1
 
-    if not chunks:
+    if not total:
         print(
             "No Git data available (no commits and no staged changes).", file=sys.stderr
         )
         return 0
 
-    if args.chunk_index < 0 or args.chunk_index >= len(chunks):
+    if chunk is None:
         print(
             f"Requested --chunk-index {args.chunk_index} is out of range; "
-            f"there are {len(chunks)} chunk(s).",
+            f"there are {total} chunk(s).",
             file=sys.stderr,
         )
         return 2
 
     current_index = args.chunk_index
-    total = len(chunks)
-    chunk = chunks[current_index]
 
-    # Print the selected chunk with simple markers to clarify boundaries
-    print(f"[conventional-committer] chunk {current_index + 1}/{total}")
+    # Write the selected chunk with simple markers to clarify boundaries.  The
+    # chunk is already encoded, so it goes out as-is in a single write.
+    header = f"[conventional-committer] chunk {current_index + 1}/{total}\n"
+    footer = f"[conventional-committer] end of chunk {current_index + 1}/{total}\n"
     # Avoid adding an extra newline if the chunk already ends with one
-    print(chunk, end="" if chunk.endswith("\n") else "\n")
-    print(f"[conventional-committer] end of chunk {current_index + 1}/{total}")
+    newline = b"" if chunk.endswith(b"\n") else b"\n"
+    sys.stdout.flush()
+    sys.stdout.buffer.write(
+        b"".join((header.encode(), chunk, newline, footer.encode()))
+    )
+    sys.stdout.buffer.flush()
 
     # If there are more chunks, print the exact command to fetch the next one
     if current_index + 1 < total:
@@ -233,7 +579,7 @@ def main(argv: List[str]) -> int:
             os.path.relpath(sys.argv[0]) if os.path.isabs(sys.argv[0]) else sys.argv[0]
         )
         next_index = current_index + 1
-        if args.limit != CHAR_LIMIT:
+        if args.limit != BYTE_LIMIT:
             next_cmd = (
                 f"python3 {script_path} --chunk-index {next_index} --limit {args.limit}"
             )
@@ -6,38 +6,26 @@
 # dependencies = [
 #     "typer>=0.12.0",
 #     "rich>=13.7.0",
+#     "orjson>=3.10",
 # ]
 # ///
 
 import json
-import re
-import subprocess
 import sys
 
 import rich.console
 import rich.panel
 import typer
+from email_common import (
+    ACCOUNT,
+    json_loads,
+    parse_email_address,
+    parse_message,
+    parse_to_addresses,
+    run_himalaya,
+)
 
-ACCOUNT = "akaihola"
-
-
-def run_himalaya(args: list[str], verbose: bool = False) -> subprocess.CompletedProcess:
-    """Run a himalaya command and return result."""
-    if verbose:
-        console.print(f"[dim]Running: himalaya {' '.join(args)}[/dim]")
-
-    result = subprocess.run(
-        ["himalaya", *args],
-        check=False, capture_output=True,
-        text=True,
-    )
-
-    if result.returncode != 0 and args[0] != "envelope" and args[1] == "delete":
-        console.print(f"[red]Error running himalaya:[/red] {result.stderr}")
-        console.print(f"[red]Command:[/red] himalaya {' '.join(args)}")
-        raise typer.Exit(1)
-
-    return result
+console = rich.console.Console(force_terminal=False)
 
 
 def is_interactive() -> bool:
@@ -45,23 +33,6 @@ def is_interactive() -> bool:
     return sys.stdin.isatty()
 
 
-def parse_email_headers(message_text: str) -> dict:
-    """Parse email headers from message text."""
-    headers_end = message_text.find("\n\n")
-    if headers_end == -1:
-        headers_end = message_text.find("\n---\n")
-
-    header_text = message_text[:headers_end] if headers_end > 0 else message_text
-
-    headers = {}
-    for line in header_text.split("\n"):
-        if ":" in line:
-            key, value = line.split(":", 1)
-            headers[key.strip().lower()] = value.strip()
-
-    return headers
-
-
 def get_message(message_id: int, folder: str, verbose: bool = False) -> dict | None:
     """Get full message (headers + body) by ID."""
     result = run_himalaya(
@@ -81,18 +52,11 @@ def get_message(message_id: int, folder: str, verbose: bool = False) -> dict | N
     )
 
     try:
-        message_text = json.loads(result.stdout)
+        message_text = json_loads(result.stdout)
         if not isinstance(message_text, str):
             return None
 
-        headers = parse_email_headers(message_text)
-
-        headers_end = message_text.find("\n\n")
-        if headers_end == -1:
-            headers_end = message_text.find("\n---\n")
-        body = (
-            message_text[headers_end + 2 :].strip() if headers_end > 0 else message_text
-        )
+        headers, body = parse_message(message_text)
 
         envelope = {
             "id": str(message_id),
@@ -103,51 +67,10 @@ def get_message(message_id: int, folder: str, verbose: bool = False) -> dict | N
         }
 
         if "from" in headers:
-            from_match = re.match(r"^(.*?)\s*<([^>]+)>$", headers["from"])
-            if from_match:
-                envelope["from"] = {
-                    "name": from_match.group(1).strip(),
-                    "address": from_match.group(2).strip(),
-                }
-            elif "<" in headers["from"] and ">" in headers["from"]:
-                email = re.search(r"<([^>]+)>", headers["from"])
-                if email:
-                    envelope["from"] = {"address": email.group(1)}
-            else:
-                envelope["from"] = {"address": headers["from"]}
+            envelope["from"] = parse_email_address(headers["from"])
 
         if "to" in headers:
-            to_addrs = [addr.strip() for addr in headers["to"].split(",")]
-            if len(to_addrs) == 1:
-                to_match = re.match(r"^(.*?)\s*<([^>]+)>$", to_addrs[0])
-                if to_match:
-                    envelope["to"] = {
-                        "name": to_match.group(1).strip(),
-                        "address": to_match.group(2).strip(),
-                    }
-                elif "<" in to_addrs[0] and ">" in to_addrs[0]:
-                    email = re.search(r"<([^>]+)>", to_addrs[0])
-                    if email:
-                        envelope["to"] = {"address": email.group(1)}
-                else:
-                    envelope["to"] = {"address": to_addrs[0]}
-            else:
-                envelope["to"] = []
-                for to_addr in to_addrs:
-                    to_match = re.match(r"^(.*?)\s*<([^>]+)>$", to_addr)
-                    if to_match:
-                        envelope["to"].append(
-                            {
-                                "name": to_match.group(1).strip(),
-                                "address": to_match.group(2).strip(),
-                            }
-                        )
-                    elif "<" in to_addr and ">" in to_addr:
-                        email = re.search(r"<([^>]+)>", to_addr)
-                        if email:
-                            envelope["to"].append({"address": email.group(1)})
-                    else:
-                        envelope["to"].append({"address": to_addr})
+            envelope["to"] = parse_to_addresses(headers["to"])
 
         envelope["date"] = headers.get("date", "")
         envelope["subject"] = headers.get("subject", "")
@@ -160,8 +83,6 @@ def get_message(message_id: int, folder: str, verbose: bool = False) -> dict | N
 
 def show_email_preview(email: dict) -> None:
     """Display email preview in a styled panel."""
-    console = rich.console.Console(force_terminal=False)
-
     date_str = email.get("date", "N/A")
     from_data = email.get("from", {})
     from_name = from_data.get("name", "") if isinstance(from_data, dict) else ""
@@ -189,8 +110,6 @@ def delete_email(
     message_id: int, folder: str = "INBOX", execute: bool = False, verbose: bool = False
 ) -> None:
     """Delete email by message ID with safety checks."""
-    console = rich.console.Console(force_terminal=False)
-
     console.print(f"[dim]Fetching message {message_id} from {folder}...[/dim]")
     message_data = get_message(message_id, folder, verbose=verbose)
 
@@ -228,7 +147,8 @@ def delete_email(
 
     console.print(f"[dim]Deleting message {message_id}...[/dim]")
 
-    result = run_himalaya(
+    # Exits with himalaya's error message if the deletion fails
+    run_himalaya(
         [
             "envelope",
             "delete",
@@ -241,15 +161,8 @@ def delete_email(
         verbose=verbose,
     )
 
-    if result.returncode == 0:
-        console.print()
-        console.print("[green]✅ Email deleted successfully[/green]")
-    else:
-        console.print()
-        console.print("[red]❌ Delete failed[/red]")
-        if result.stderr:
-            console.print(f"[dim]{result.stderr}[/dim]")
-        sys.exit(1)
+    console.print()
+    console.print("[green]✅ Email deleted successfully[/green]")
 
 
 def main(
@@ -6,15 +6,23 @@
 # dependencies = [
 #     "typer>=0.12.0",
 #     "rich>=13.7.0",
+#     "orjson>=3.10",
 # ]
 # ///
 
-import json
 import subprocess
+from datetime import date, timedelta
 
 import rich.console
 import rich.panel
 import rich.table
+from email_common import (
+    ENVELOPE_LIST_TTL,
+    envelope_cache_path,
+    json_loads,
+    load_json_cache,
+    store_json_cache,
+)
 
 ACCOUNT = "akaihola"
 MAX_LIMIT = 100
@@ -23,19 +31,67 @@ UNLIMITED_PAGE_SIZE = 10000
 DEFAULT_PAGE_SIZE = 500
 UNLIMITED_PAGE_SIZE = 10000
 
+console = rich.console.Console(force_terminal=False)
+
 
 def run_himalaya(args: list[str], page_size: int, verbose: bool = False) -> list[dict]:
     """Run himalaya and return parsed JSON output."""
     cmd = ["himalaya", *args]
 
-    if verbose:
-        rich.console.Console().print(f"[dim]Running: {' '.join(cmd)}[/dim]")
-
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    # Repeated searches over the same folder reuse the listing for a minute
+    cache_path = envelope_cache_path(*args)
+    envelopes = load_json_cache(cache_path, ENVELOPE_LIST_TTL)
+    if isinstance(envelopes, list):
+        return envelopes
 
-    if result.stdout.strip():
-        return json.loads(result.stdout)
-    return []
+    if verbose:
+        console.print(f"[dim]Running: {' '.join(cmd)}[/dim]")
+
+    result = subprocess.run(cmd, capture_output=True, check=True)
+
+    envelopes = json_loads(result.stdout) if result.stdout.strip() else []
+    store_json_cache(cache_path, envelopes)
+    return envelopes
+
+
+def _query_value(value: str) -> str | None:
+    """Quote a pattern for a himalaya query, or None if it cannot be quoted."""
+    if '"' in value:
+        return None
+    return f'"{value}"' if any(c.isspace() for c in value) else value
+
+
+def _shift_date(value: str, days: int) -> str | None:
+    try:
+        return (date.fromisoformat(value) + timedelta(days=days)).isoformat()
+    except ValueError:
+        return None
+
+
+def build_query(
+    from_filter: str | None,
+    subject: str | None,
+    date_start: str | None,
+    date_end: str | None,
+) -> str:
+    """Build a himalaya envelope query so the IMAP server does the filtering.
+
+    Date bounds are widened by a day since "after" and "before" are exclusive;
+    the filter loop in search_emails() still applies the exact criteria.
+    Anything that cannot be expressed safely is left to that loop.
+    """
+    conditions = []
+    for keyword, value in (("from", from_filter), ("subject", subject)):
+        pattern = _query_value(value) if value else None
+        if pattern:
+            conditions.append(f"{keyword} {pattern}")
+    after = _shift_date(date_start, -1) if date_start else None
+    if after:
+        conditions.append(f"after {after}")
+    before = _shift_date(date_end, 1) if date_end else None
+    if before:
+        conditions.append(f"before {before}")
+    return " and ".join(conditions)
 
 
 def search_emails(
@@ -49,8 +105,6 @@ def search_emails(
     verbose: bool = False,
 ) -> None:
     """Search emails and display results."""
-    console = rich.console.Console(force_terminal=False)
-
     effective_limit = None if no_limit else min(limit, MAX_LIMIT)
     page_size = UNLIMITED_PAGE_SIZE if no_limit else DEFAULT_PAGE_SIZE
 
@@ -66,40 +120,37 @@ def search_emails(
         "--output",
         "json",
     ]
+    query = build_query(from_filter, subject, date_start, date_end)
+    if query:
+        args.append(query)
 
     envelopes = run_himalaya(args, page_size, verbose)
 
     results: list[dict] = []
+    from_search = from_filter.lower() if from_filter else None
+    subject_search = subject.lower() if subject else None
 
     for email in envelopes:
-        if from_filter:
+        if from_search:
             from_field = email.get("from") or {}
-            from_name = (from_field.get("name") or "").lower()
-            from_addr = (from_field.get("addr") or "").lower()
-            from_search = from_filter.lower()
-            if from_search not in from_name and from_search not in from_addr:
+            if from_search not in (from_field.get("name") or "").lower() and (
+                from_search not in (from_field.get("addr") or "").lower()
+            ):
                 continue
 
-        if subject:
-            subject_text = email.get("subject", "").lower()
-            subject_search = subject.lower()
-            if subject_search not in subject_text:
-                continue
+        if subject_search and subject_search not in email.get("subject", "").lower():
+            continue
 
-        if date_start:
+        if date_start or date_end:
             email_date_str = email.get("date", "")[:10]
-            if email_date_str < date_start:
+            if date_start and email_date_str < date_start:
                 continue
-
-        if date_end:
-            email_date_str = email.get("date", "")[:10]
-            if email_date_str > date_end:
+            if date_end and email_date_str > date_end:
                 continue
 
         results.append(email)
-
-    if effective_limit:
-        results = results[:effective_limit]
+        if effective_limit and len(results) >= effective_limit:
+            break
 
     if results:
         criteria_parts = []
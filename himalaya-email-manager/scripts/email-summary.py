@@ -6,42 +6,61 @@
 # dependencies = [
 #     "typer>=0.12.0",
 #     "rich>=13.7.0",
+#     "orjson>=3.10",
 # ]
 # ///
 
-import json
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 
 import rich.console
 import rich.panel
 import rich.table
+from email_common import (
+    ENVELOPE_LIST_TTL,
+    envelope_cache_path,
+    json_loads,
+    load_json_cache,
+    store_json_cache,
+)
 
 ACCOUNT = "akaihola"
+SUMMARY_PAGE_SIZE = 200
+
+console = rich.console.Console(force_terminal=False)
 
 
 def run_himalaya(args: list[str], verbose: bool = False) -> list[dict]:
     """Run himalaya and return parsed JSON output."""
     cmd = ["himalaya", *args]
 
+    # Running the summary again shortly after reuses the listings
+    cache_path = envelope_cache_path(*args)
+    envelopes = load_json_cache(cache_path, ENVELOPE_LIST_TTL)
+    if isinstance(envelopes, list):
+        return envelopes
+
     if verbose:
-        rich.console.Console().print(f"[dim]Running: {' '.join(cmd)}[/dim]")
+        console.print(f"[dim]Running: {' '.join(cmd)}[/dim]")
 
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    result = subprocess.run(cmd, capture_output=True, check=True)
 
-    if result.stdout.strip():
-        return json.loads(result.stdout)
-    return []
+    envelopes = json_loads(result.stdout) if result.stdout.strip() else []
+    store_json_cache(cache_path, envelopes)
+    return envelopes
 
 
 def get_email_summary(verbose: bool = False) -> None:
     """Display emails from past 24 hours."""
-    console = rich.console.Console(force_terminal=False)
-
     today = date.today()
     yesterday = today - timedelta(days=1)
+    # Let himalaya drop older envelopes before they are serialized to JSON.
+    # Whether "after" is inclusive or not, starting a day early keeps all of
+    # yesterday; the date prefix check below does the exact filtering.
+    query = f"after {(yesterday - timedelta(days=1)).isoformat()} order by date desc"
 
-    for folder_name, folder_icon in [("INBOX", "📥"), ("Sent", "📤")]:
+    def fetch_envelopes(folder_name: str) -> list[dict]:
         args = [
             "envelope",
             "list",
@@ -49,17 +68,28 @@ def get_email_summary(verbose: bool = False) -> None:
             ACCOUNT,
             "--folder",
             folder_name,
+            "--page-size",
+            str(SUMMARY_PAGE_SIZE),
             "--output",
             "json",
+            query,
         ]
-
-        envelopes = run_himalaya(args, verbose)
-
+        return run_himalaya(args, verbose)
+
+    folders = [("INBOX", "📥"), ("Sent", "📤")]
+    # The listings are independent himalaya runs, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=len(folders)) as executor:
+        folder_envelopes = list(
+            executor.map(fetch_envelopes, [name for name, _ in folders])
+        )
+
+    recent_days = (today.isoformat(), yesterday.isoformat())
+    for (folder_name, folder_icon), envelopes in zip(
+        folders, folder_envelopes, strict=True
+    ):
+        # The query already returns the envelopes newest first
         recent_emails = [
-            e
-            for e in envelopes
-            if e.get("date", "").startswith(today.isoformat())
-            or e.get("date", "").startswith(yesterday.isoformat())
+            e for e in envelopes if e.get("date", "").startswith(recent_days)
         ]
 
         if recent_emails:
@@ -79,9 +109,7 @@ def get_email_summary(verbose: bool = False) -> None:
             table.add_column("Subject", style="yellow")
             table.add_column("ID", style="magenta", width=8)
 
-            for email in sorted(
-                recent_emails, key=lambda e: e.get("date", ""), reverse=True
-            ):
+            for email in recent_emails:
                 date_str = email.get("date", "N/A")[:10]
                 from_name = email.get("from", {}).get("name", "")
                 from_addr = email.get("from", {}).get("addr", "")
@@ -0,0 +1,333 @@
+# Copyright (c) 2025 Antti Kaihola
+# SPDX-License-Identifier: MIT
+
+"""Helpers shared by the himalaya email scripts.
+
+Scripts import this module from their own directory, so it must only depend
+on packages that every importing script lists in its PEP 723 header.
+``html2text`` is imported lazily for that reason, and ``orjson`` falls back
+to the standard library when it is missing.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess  # noqa: S404
+import time
+from pathlib import Path
+
+import typer
+from rich.console import Console
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+console = Console()
+
+ACCOUNT = "akaihola"
+
+ENVELOPE_CACHE_DIR = Path.home() / ".cache" / "himalaya-email-manager" / "envelopes"
+# Listings shown to the user must not hide new mail for long
+ENVELOPE_LIST_TTL = 60
+
+_PART_RE = re.compile(
+    r'<#part\s+type=([^>\s]+)(?:\s+filename="([^"]*)")?>(.*?)<#/part>', re.DOTALL
+)
+
+
+def run_himalaya(
+    args: list[str], *, verbose: bool = False
+) -> subprocess.CompletedProcess:
+    """Run a himalaya command and return result.
+
+    Args:
+        args: Command arguments to pass to himalaya
+        verbose: Print debug info about the command
+
+    Returns:
+        CompletedProcess containing raw ``bytes`` stdout, stderr, and return code
+
+    Raises:
+        typer.Exit: If himalaya is not found or command fails
+
+    """
+    if verbose:
+        console.print(f"[dim]Running: himalaya {' '.join(args)}[/dim]")
+
+    himalaya_path = shutil.which("himalaya")
+    if not himalaya_path:
+        console.print("[red]Error:[/red] himalaya command not found in PATH")
+        raise typer.Exit(1)
+
+    result = subprocess.run(  # noqa: S603
+        [himalaya_path, *args],
+        check=False,
+        capture_output=True,
+        shell=False,
+    )
+
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", errors="replace")
+        console.print(f"[red]Error running himalaya:[/red] {stderr}")
+        console.print(f"[red]Command:[/red] himalaya {' '.join(args)}")
+        raise typer.Exit(1)
+
+    return result
+
+
+def json_loads(raw: bytes | str) -> object:
+    """Parse JSON from himalaya output or a cache file.
+
+    Both backends raise a subclass of ``json.JSONDecodeError`` on bad input.
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_dumps(data: object, *, indent: bool = False) -> str:
+    """Serialize data to JSON text, keeping non-ASCII characters as is.
+
+    Returns:
+        JSON string, indented by two spaces when ``indent`` is set
+
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option).decode("utf-8")
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False)
+
+
+def _find_headers_end(message_text: str) -> int:
+    headers_end = message_text.find("\n\n")
+    if headers_end == -1:
+        headers_end = message_text.find("\n---\n")
+    return headers_end
+
+
+def _parse_header_lines(message_text: str, end: int) -> dict:
+    # Scan line by line with find() instead of materialising a list of lines
+    headers = {}
+    start = 0
+    while start < end:
+        newline = message_text.find("\n", start, end)
+        if newline == -1:
+            newline = end
+        colon = message_text.find(":", start, newline)
+        if colon != -1:
+            key = message_text[start:colon].strip().lower()
+            headers[key] = message_text[colon + 1 : newline].strip()
+        start = newline + 1
+
+    return headers
+
+
+def envelope_cache_path(*key_parts: str, cache_dir: Path | None = None) -> Path:
+    """Return the cache file for envelopes identified by ``key_parts``.
+
+    Returns:
+        Path of a JSON file named after a digest of the account and key parts
+
+    """
+    key = "\0".join((ACCOUNT, *key_parts))
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return (cache_dir or ENVELOPE_CACHE_DIR) / f"{digest}.json"
+
+
+def load_json_cache(path: Path, ttl: float) -> object | None:
+    """Load a cached JSON document unless it is missing, stale or corrupt.
+
+    Returns:
+        Parsed JSON data, or None on a cache miss
+
+    """
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        return json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def store_json_cache(path: Path, data: object) -> None:
+    """Atomically write JSON data to a cache file, ignoring write errors."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json_dumps(data), encoding="utf-8")
+        tmp_path.replace(path)
+    except OSError:
+        pass
+
+
+def parse_email_headers(message_text: str) -> dict:
+    """Parse email headers from message text.
+
+    Returns:
+        Dictionary mapping lowercase header names to values
+
+    """
+    headers_end = _find_headers_end(message_text)
+    if headers_end <= 0:
+        headers_end = len(message_text)
+    return _parse_header_lines(message_text, headers_end)
+
+
+def parse_message(message_text: str) -> tuple[dict, str]:
+    """Parse headers and extract the body, locating the separator only once.
+
+    Returns:
+        Tuple of header dictionary and message body content
+
+    """
+    headers_end = _find_headers_end(message_text)
+    if headers_end <= 0:
+        return _parse_header_lines(message_text, len(message_text)), message_text
+    headers = _parse_header_lines(message_text, headers_end)
+    return headers, message_text[headers_end + 2 :].strip()
+
+
+def parse_email_address(address: str) -> dict:
+    """Parse a single email address into name and address components.
+
+    Returns:
+        Dictionary with 'address' key, and optionally 'name' key
+
+    """
+    # "Name <addr>" ends with the bracketed address: split at the first "<"
+    # after the last inner ">", keeping the name even when it is empty
+    if address.endswith(">"):
+        lt = address.find("<", address.rfind(">", 0, -1) + 1)
+        if 0 <= lt < len(address) - 2:
+            return {
+                "name": address[:lt].strip(),
+                "address": address[lt + 1 : -1].strip(),
+            }
+    # Otherwise use the first non-empty "<addr>" anywhere in the text
+    lt = address.find("<")
+    while lt != -1:
+        gt = address.find(">", lt + 1)
+        if gt == -1:
+            break
+        if gt > lt + 1:
+            return {"address": address[lt + 1 : gt]}
+        lt = address.find("<", lt + 1)
+    return {"address": address}
+
+
+def parse_to_addresses(to_header: str) -> dict | list:
+    """Parse To header into single address dict or list of dicts.
+
+    Returns:
+        Single address dict if one recipient, list of dicts for multiple recipients
+
+    """
+    to_addrs = [addr.strip() for addr in to_header.split(",")]
+    if len(to_addrs) == 1:
+        return parse_email_address(to_addrs[0])
+    return [parse_email_address(addr) for addr in to_addrs]
+
+
+def format_address(address: dict) -> str:
+    """Render an address dict as ``Name <address>``, or the bare address.
+
+    Returns:
+        Display string for the address
+
+    """
+    name = address.get("name")
+    addr = address.get("address", "")
+    return f"{name} <{addr}>" if name else addr
+
+
+def format_recipients(to_data: dict | list) -> str:
+    """Render a parsed To header as a comma-separated display string.
+
+    Returns:
+        Display string for one or more recipients, or an empty string
+
+    """
+    if isinstance(to_data, list):
+        return ", ".join(format_address(to) for to in to_data)
+    if isinstance(to_data, dict):
+        return format_address(to_data)
+    return ""
+
+
+def _stripped_group(match: re.Match, group: int) -> str:
+    # Trim whitespace by moving the span bounds so that a large part is
+    # copied out of the body once instead of group() followed by strip().
+    text = match.string
+    start, end = match.span(group)
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return text[start:end]
+
+
+def parse_mime_parts(raw_body: str) -> list[dict]:
+    """Parse MIME parts from himalaya's <#part> tags.
+
+    Returns:
+        List of dicts with 'type', 'filename' and 'content' keys
+
+    """
+    return [
+        {
+            "type": match[1],
+            "filename": match[2] or None,
+            "content": _stripped_group(match, 3),
+        }
+        for match in _PART_RE.finditer(raw_body)
+    ]
+
+
+def find_preferred_part(raw_body: str) -> tuple[str, str]:
+    """Find the body part to display without building the full part list.
+
+    The last ``text/plain`` part wins, falling back to the last ``text/html``
+    part. Only the chosen part's content is copied out of ``raw_body``.
+
+    Returns:
+        Tuple of part type and stripped content, or two empty strings
+
+    """
+    text_plain_match = None
+    text_html_match = None
+
+    for match in _PART_RE.finditer(raw_body):
+        part_type = match[1]
+        if part_type == "text/plain":
+            text_plain_match = match
+        elif part_type == "text/html":
+            text_html_match = match
+
+    chosen = text_plain_match or text_html_match
+    if chosen is None:
+        return "", ""
+    return chosen[1], _stripped_group(chosen, 3)
+
+
+def html_to_text(html: str) -> str:
+    """Convert an HTML body to Markdown-flavoured plain text.
+
+    ``html2text`` is only imported when an HTML part has to be converted.
+
+    Returns:
+        Converted text with links and images kept and no line wrapping
+
+    """
+    import html2text  # noqa: PLC0415
+
+    h = html2text.HTML2Text()
+    h.ignore_links = False
+    h.ignore_images = False
+    h.body_width = 0
+    return h.handle(html)
@@ -9,91 +9,100 @@
 # dependencies = [
 #     "typer>=0.12.0",
 #     "rich>=13.7.0",
+#     "orjson>=3.10",
 # ]
 # ///
 
 import json
+import os
 import re
 import shutil
-import subprocess  # noqa: S404
+import stat
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from email.utils import parsedate_to_datetime
 from pathlib import Path
-from textwrap import dedent
 from typing import Annotated, Literal
 
 import typer
-from rich.console import Console
+from email_common import (
+    ACCOUNT,
+    ENVELOPE_CACHE_DIR,
+    console,
+    envelope_cache_path,
+    format_address,
+    format_recipients,
+    json_dumps,
+    json_loads,
+    load_json_cache,
+    parse_email_address,
+    parse_message,
+    parse_to_addresses,
+    run_himalaya,
+    store_json_cache,
+)
 from rich.panel import Panel
 from rich.prompt import Confirm
 
 app = typer.Typer(help="Save emails to files in various formats")
-console = Console()
 
-ACCOUNT = "akaihola"
+# Message IDs can be renumbered after expunges, so cached envelopes go stale
+ENVELOPE_CACHE_TTL = 600
 
+_ATTACHMENT_PART_RE = re.compile(
+    r'<#part\s+type=([^>\s]+)\s+filename="([^"]+)"><#/part>'
+)
+_DOWNLOADING_RE = re.compile(r'Downloading "(.+?)"…')
 
-def run_himalaya(
-    args: list[str], *, verbose: bool = False
-) -> subprocess.CompletedProcess:
-    """Run a himalaya command and return result.
+# Saving several messages runs this many IMAP sessions at once
+MAX_PARALLEL_SAVES = 5
+_ATTACHMENT_LOCK = threading.Lock()
+_PROMPT_LOCK = threading.Lock()
 
-    Args:
-        args: Command arguments to pass to himalaya
-        verbose: Print debug info about the command
-
-    Returns:
-        CompletedProcess containing stdout, stderr, and return code
 
-    Raises:
-        typer.Exit: If himalaya is not found or command fails
-
-    """
-    if verbose:
-        console.print(f"[dim]Running: himalaya {' '.join(args)}[/dim]")
+def _envelope_cache_path(folder: str, from_address: str) -> Path:
+    return envelope_cache_path(folder, from_address, cache_dir=ENVELOPE_CACHE_DIR)
 
-    himalaya_path = shutil.which("himalaya")
-    if not himalaya_path:
-        console.print("[red]Error:[/red] himalaya command not found in PATH")
-        raise typer.Exit(1)
-
-    result = subprocess.run(  # noqa: S603
-        [himalaya_path, *args],
-        check=False,
-        capture_output=True,
-        text=True,
-        shell=False,
-    )
-
-    if result.returncode != 0:
-        console.print(f"[red]Error running himalaya:[/red] {result.stderr}")
-        console.print(f"[red]Command:[/red] himalaya {' '.join(args)}")
-        raise typer.Exit(1)
 
-    return result
+def _load_envelope_cache(path: Path) -> dict[str, dict] | None:
+    envelopes = load_json_cache(path, ENVELOPE_CACHE_TTL)
+    return envelopes if isinstance(envelopes, dict) else None
 
 
-def parse_email_headers(message_text: str) -> dict:
-    """Parse email headers from message text.
+def _fetch_envelopes(
+    folder: str, from_address: str, *, verbose: bool = False
+) -> dict[str, dict]:
+    """List envelopes from a sender and index them by message ID.
 
     Returns:
-        Dictionary mapping lowercase header names to values
+        Dictionary mapping message ID strings to envelope dicts
 
     """
-    headers_end = message_text.find("\n\n")
-    if headers_end == -1:
-        headers_end = message_text.find("\n---\n")
-
-    header_text = message_text[:headers_end] if headers_end > 0 else message_text
-
-    headers = {}
-    for line in header_text.split("\n"):
-        if ":" in line:
-            key, value = line.split(":", 1)
-            headers[key.strip().lower()] = value.strip()
+    result = run_himalaya(
+        [
+            "envelope",
+            "list",
+            "--account",
+            ACCOUNT,
+            "--folder",
+            folder,
+            "--output",
+            "json",
+            f"from {from_address}",
+        ],
+        verbose=verbose,
+    )
 
-    return headers
+    envelopes = json_loads(result.stdout)
+    if not isinstance(envelopes, list):
+        return {}
+    return {
+        str(envelope["id"]): envelope
+        for envelope in envelopes
+        if isinstance(envelope, dict) and "id" in envelope
+    }
 
 
 def get_envelope_date(
@@ -102,6 +111,8 @@ def get_envelope_date(
     """Fetch envelope date from himalaya envelope list by searching.
 
     Searches envelopes by sender address and finds the one matching the message ID.
+    The envelope list is cached on disk per folder and sender, and fetched again
+    when the cache is stale or does not contain the message.
 
     Args:
         message_id: Message ID to search for
@@ -116,81 +127,23 @@ def get_envelope_date(
     if not from_address:
         return ""
 
-    try:
-        result = run_himalaya(
-            [
-                "envelope",
-                "list",
-                "--account",
-                ACCOUNT,
-                "--folder",
-                folder,
-                "--output",
-                "json",
-                f"from {from_address}",
-            ],
-            verbose=verbose,
-        )
-
-        envelopes = json.loads(result.stdout)
-        if isinstance(envelopes, list):
-            for envelope in envelopes:
-                if envelope.get("id") == str(message_id) and "date" in envelope:
-                    return envelope["date"]
-    except (json.JSONDecodeError, KeyError, IndexError):
-        pass
-    except SystemExit:
-        pass
-
+    cache_path = _envelope_cache_path(folder, from_address)
+    envelopes = _load_envelope_cache(cache_path)
+    if envelopes is None or str(message_id) not in envelopes:
+        try:
+            envelopes = _fetch_envelopes(folder, from_address, verbose=verbose)
+        except (json.JSONDecodeError, KeyError, IndexError):
+            return ""
+        except SystemExit:
+            return ""
+        store_json_cache(cache_path, envelopes)
+
+    envelope = envelopes.get(str(message_id))
+    if isinstance(envelope, dict) and "date" in envelope:
+        return envelope["date"]
     return ""
 
 
-def parse_email_address(address: str) -> dict:
-    """Parse a single email address into name and address components.
-
-    Returns:
-        Dictionary with 'address' key, and optionally 'name' key
-
-    """
-    match = re.match(r"^(.*?)\s*<([^>]+)>$", address)
-    if match:
-        return {
-            "name": match.group(1).strip(),
-            "address": match.group(2).strip(),
-        }
-    if "<" in address and ">" in address:
-        email = re.search(r"<([^>]+)>", address)
-        if email:
-            return {"address": email.group(1)}
-    return {"address": address}
-
-
-def parse_to_addresses(to_header: str) -> dict | list:
-    """Parse To header into single address dict or list of dicts.
-
-    Returns:
-        Single address dict if one recipient, list of dicts for multiple recipients
-
-    """
-    to_addrs = [addr.strip() for addr in to_header.split(",")]
-    if len(to_addrs) == 1:
-        return parse_email_address(to_addrs[0])
-    return [parse_email_address(addr) for addr in to_addrs]
-
-
-def extract_message_body(message_text: str) -> str:
-    """Extract body from message text by finding headers separator.
-
-    Returns:
-        Message body content after headers separator
-
-    """
-    headers_end = message_text.find("\n\n")
-    if headers_end == -1:
-        headers_end = message_text.find("\n---\n")
-    return message_text[headers_end + 2 :].strip() if headers_end > 0 else message_text
-
-
 def get_message(message_id: int, folder: str, *, verbose: bool = False) -> dict:
     """Get full message (headers + body) by ID.
 
@@ -217,45 +170,50 @@ def get_message(message_id: int, folder: str, *, verbose: bool = False) -> dict:
         verbose=verbose,
     )
 
-    try:
-        message_text = json.loads(result.stdout)
-        if not isinstance(message_text, str):
-            message_text = ""
-
-        headers = parse_email_headers(message_text)
-        body = extract_message_body(message_text)
-
-        envelope = {
-            "id": str(message_id),
-            "from": {},
-            "to": {},
-            "date": "",
-            "subject": "",
-        }
-
-        if "from" in headers:
-            envelope["from"] = parse_email_address(headers["from"])
-
-        if "to" in headers:
-            envelope["to"] = parse_to_addresses(headers["to"])
-
-        envelope["date"] = headers.get("date", "")
-        if not envelope["date"]:
-            from_addr = envelope.get("from", {}).get("address", "")
-            envelope["date"] = get_envelope_date(
-                message_id, folder, from_addr, verbose=verbose
-            )
+    if not result.stdout.strip():
+        console.print(f"[red]Error:[/red] himalaya returned no message {message_id}")
+        raise typer.Exit(1)
 
-        envelope["subject"] = headers.get("subject", "")
+    try:
+        message_text = json_loads(result.stdout)
     except json.JSONDecodeError as e:
         console.print(f"[red]Error parsing JSON:[/red] {e}")
         raise typer.Exit(1) from e
-    else:
-        return {"envelope": envelope, "body": body}
+
+    if not isinstance(message_text, str):
+        message_text = ""
+
+    headers, body = parse_message(message_text)
+
+    envelope = {
+        "id": str(message_id),
+        "from": {},
+        "to": {},
+        "date": "",
+        "subject": "",
+    }
+
+    if "from" in headers:
+        envelope["from"] = parse_email_address(headers["from"])
+
+    if "to" in headers:
+        envelope["to"] = parse_to_addresses(headers["to"])
+
+    envelope["date"] = headers.get("date", "")
+    if not envelope["date"]:
+        from_addr = envelope.get("from", {}).get("address", "")
+        envelope["date"] = get_envelope_date(
+            message_id, folder, from_addr, verbose=verbose
+        )
+
+    envelope["subject"] = headers.get("subject", "")
+    return {"envelope": envelope, "body": body}
 
 
 MAX_FILENAME_LENGTH = 200
 
+_FILENAME_TABLE = str.maketrans({"/": "-", "\\": "-", "\x00": None})
+
 
 def sanitize_filename(name: str) -> str:
     """Sanitize filename for Unix filesystems.
@@ -264,11 +222,7 @@ def sanitize_filename(name: str) -> str:
         Safe filename string for Unix systems
 
     """
-    sanitized = name.replace("/", "-").replace("\\", "-")
-    sanitized = sanitized.replace("\x00", "")
-    if len(sanitized) > MAX_FILENAME_LENGTH:
-        sanitized = sanitized[:MAX_FILENAME_LENGTH]
-    return sanitized
+    return name.translate(_FILENAME_TABLE)[:MAX_FILENAME_LENGTH]
 
 
 def generate_filename(
@@ -292,37 +246,23 @@ def generate_filename(
     }[output_format]
 
     if date_prefix and date_str:
-        date_formats = [
-            "%Y-%m-%d %H:%M%z",
-            "%Y-%m-%d %H:%M:%S%z",
-            "%Y-%m-%d %H:%M:%S",
-            "%Y-%m-%d %H:%M",
-            "%Y-%m-%d",
-        ]
-
-        for date_format in date_formats:
+        # Envelope dates are ISO 8601, Date headers are RFC 2822
+        try:
+            date_obj = datetime.fromisoformat(date_str)
+        except ValueError:
             try:
-                date_obj = datetime.strptime(date_str, date_format)  # noqa: DTZ007
-                date_obj = date_obj.astimezone()
-                date_prefix_str = date_obj.strftime("%Y-%m-%d")
-                sanitized_subject = sanitize_filename(subject)
-            except ValueError:
-                continue
-            else:
-                return f"{date_prefix_str}-{sanitized_subject}.{ext}"
+                date_obj = parsedate_to_datetime(date_str)
+            except (TypeError, ValueError):
+                date_obj = None
 
-        try:
-            date_obj = parsedate_to_datetime(date_str)
-            date_obj = date_obj.astimezone()
-            date_prefix_str = date_obj.strftime("%Y-%m-%d")
-            sanitized_subject = sanitize_filename(subject)
-        except (TypeError, ValueError):
+        if date_obj is None:
             console.print(
                 f"[yellow]⚠[/yellow] Could not parse date: [dim]{date_str}[/dim]\n"
                 f"[yellow]⚠[/yellow] Falling back to message ID in filename"
             )
         else:
-            return f"{date_prefix_str}-{sanitized_subject}.{ext}"
+            date_prefix_str = date_obj.astimezone().strftime("%Y-%m-%d")
+            return f"{date_prefix_str}-{sanitize_filename(subject)}.{ext}"
 
     return f"{message_id}.{ext}"
 
@@ -336,27 +276,8 @@ def format_markdown(
         Formatted email as Markdown string
 
     """
-    from_data = envelope.get("from", {})
-    from_addr = from_data.get("address", "")
-    from_name = from_data.get("name", "")
-    from_str = f"{from_name} <{from_addr}>" if from_name else from_addr
-
-    to_data = envelope.get("to", {})
-    if isinstance(to_data, dict):
-        to_addr = to_data.get("address", "")
-        to_name = to_data.get("name", "")
-        to_str = f"{to_name} <{to_addr}>" if to_name else to_addr
-    elif isinstance(to_data, list):
-        to_str = ", ".join(
-            [
-                f"{t.get('name', '')} <{t.get('address', '')}>"
-                if t.get("name")
-                else t.get("address", "")
-                for t in to_data
-            ]
-        )
-    else:
-        to_str = ""
+    from_str = format_address(envelope.get("from", {}))
+    to_str = format_recipients(envelope.get("to", {}))
 
     date_str = envelope.get("date", "")
     subject_str = envelope.get("subject", "")
@@ -368,23 +289,21 @@ def format_markdown(
         for attachment in attachments:
             attachments_section += f"- `{attachment}`\n"
 
-    return dedent(
-        f"""\
-        # {subject_str}
-
-        **From:** {from_str}
-        **To:** {to_str}
-        **Date:** {date_str}
-        **Subject:** {subject_str}
-
-        ---
-
-        {body}{attachments_section}
-
-        ---
-
-        *Saved from: {folder} (ID: {message_id})*
-        """
+    return (
+        f"# {subject_str}\n"
+        "\n"
+        f"**From:** {from_str}\n"
+        f"**To:** {to_str}\n"
+        f"**Date:** {date_str}\n"
+        f"**Subject:** {subject_str}\n"
+        "\n"
+        "---\n"
+        "\n"
+        f"{body}{attachments_section}\n"
+        "\n"
+        "---\n"
+        "\n"
+        f"*Saved from: {folder} (ID: {message_id})*\n"
     )
 
 
@@ -397,27 +316,8 @@ def format_text(
         Formatted email as plain text string
 
     """
-    from_data = envelope.get("from", {})
-    from_addr = from_data.get("address", "")
-    from_name = from_data.get("name", "")
-    from_str = f"{from_name} <{from_addr}>" if from_name else from_addr
-
-    to_data = envelope.get("to", {})
-    if isinstance(to_data, dict):
-        to_addr = to_data.get("address", "")
-        to_name = to_data.get("name", "")
-        to_str = f"{to_name} <{to_addr}>" if to_name else to_addr
-    elif isinstance(to_data, list):
-        to_str = ", ".join(
-            [
-                f"{t.get('name', '')} <{t.get('address', '')}>"
-                if t.get("name")
-                else t.get("address", "")
-                for t in to_data
-            ]
-        )
-    else:
-        to_str = ""
+    from_str = format_address(envelope.get("from", {}))
+    to_str = format_recipients(envelope.get("to", {}))
 
     date_str = envelope.get("date", "")
     subject_str = envelope.get("subject", "")
@@ -429,18 +329,16 @@ def format_text(
         for attachment in attachments:
             attachments_section += f"  - {attachment}\n"
 
-    return dedent(
-        f"""\
-        From: {from_str}
-        To: {to_str}
-        Date: {date_str}
-        Subject: {subject_str}
-
-        {body}{attachments_section}
-
-        ---
-        Saved from: {folder} (ID: {message_id})
-        """
+    return (
+        f"From: {from_str}\n"
+        f"To: {to_str}\n"
+        f"Date: {date_str}\n"
+        f"Subject: {subject_str}\n"
+        "\n"
+        f"{body}{attachments_section}\n"
+        "\n"
+        "---\n"
+        f"Saved from: {folder} (ID: {message_id})\n"
     )
 
 
@@ -501,8 +399,7 @@ def fix_attachment_paths_in_body(
                 return f'<#part type={part_type} filename="{new_path}"><#/part>'
         return match.group(0)
 
-    pattern = r'<#part\s+type=([^>\s]+)\s+filename="([^"]+)"><#/part>'
-    updated_body = re.sub(pattern, replace_path, body)
+    updated_body = _ATTACHMENT_PART_RE.sub(replace_path, body)
 
     if verbose and replacement_count > 0:
         console.print(f"[dim]Fixed {replacement_count} attachment path(s)[/dim]")
@@ -511,14 +408,37 @@ def fix_attachment_paths_in_body(
 
 
 def _download_attachments_internal(
-    message_id: int, folder: str, attachment_dir: Path | None, *, verbose: bool = False
+    message_id: int,
+    folder: str,
+    attachment_dir: Path | None,
+    *,
+    verbose: bool = False,
+    replaced: set[Path] | None = None,
 ) -> list[Path]:
     """Download attachments from an email message.
 
+    Moving an attachment over an existing file adds its path to ``replaced``.
+
     Returns:
         List of downloaded attachment paths
 
     """
+    # himalaya downloads every message's attachments into the same directory,
+    # so concurrent saves must not interleave a download and its moves
+    with _ATTACHMENT_LOCK:
+        return _download_and_move_attachments(
+            message_id, folder, attachment_dir, verbose=verbose, replaced=replaced
+        )
+
+
+def _download_and_move_attachments(
+    message_id: int,
+    folder: str,
+    attachment_dir: Path | None,
+    *,
+    verbose: bool,
+    replaced: set[Path] | None,
+) -> list[Path]:
     result = run_himalaya(
         [
             "attachment",
@@ -533,10 +453,10 @@ def _download_attachments_internal(
     )
 
     downloaded_files = []
-    output_lines = result.stdout + result.stderr
-    for line in output_lines.splitlines():
-        match = re.search(r'Downloading "(.+?)"…', line)
-        if match:
+    # "." does not match newlines, so scanning each stream whole finds the
+    # same paths as a per-line search without concatenating or splitting
+    for output in (result.stdout, result.stderr):
+        for match in _DOWNLOADING_RE.finditer(output.decode("utf-8", errors="replace")):
             downloaded_path = Path(match.group(1))
             downloaded_files.append(downloaded_path)
             if verbose:
@@ -547,6 +467,8 @@ def _download_attachments_internal(
         moved_files = []
         for old_path in downloaded_files:
             new_path = attachment_dir / old_path.name
+            if replaced is not None and new_path.exists():
+                replaced.add(new_path)
             shutil.move(str(old_path), str(new_path))
             moved_files.append(new_path)
             if verbose:
@@ -568,7 +490,7 @@ def format_json(envelope: dict, body: str, folder: str) -> str:
         "envelope": envelope,
         "body": body,
     }
-    return json.dumps(data, indent=2, ensure_ascii=False)
+    return json_dumps(data, indent=True)
 
 
 @dataclass
@@ -586,33 +508,41 @@ class SaveOptions:
     verbose: bool
 
 
-def _determine_output_path(output: Path | None, filename: str) -> Path:
-    """Determine the output file path from user input.
+def _resolve_output(output: Path | None) -> tuple[Path, Path | None]:
+    """Resolve the output directory and, if one was given, the file path.
+
+    The directory does not depend on the generated filename, so it can be
+    known before the message has been fetched.
 
     Returns:
-        Resolved output path
+        Tuple of output directory and explicit output file path or None
 
     """
-    if output:
-        if output.is_dir():
-            output.mkdir(parents=True, exist_ok=True)
-            return output / filename
-        if output.exists():
-            return output
-        if not output.suffix:
-            output.mkdir(parents=True, exist_ok=True)
-            return output / filename
-        output.parent.mkdir(parents=True, exist_ok=True)
-        return output
+    if not output:
+        return Path(), None
 
-    return Path(filename)
+    # One stat() answers both "exists?" and "is it a directory?"
+    try:
+        output_stat = output.stat()
+    except OSError:
+        output_stat = None
+    if output_stat is not None:
+        if stat.S_ISDIR(output_stat.st_mode):
+            return output, None
+        return output.parent, output
+    if not output.suffix:
+        output.mkdir(parents=True, exist_ok=True)
+        return output, None
+    output.parent.mkdir(parents=True, exist_ok=True)
+    return output.parent, output
 
 
 def _process_attachments(
     options: SaveOptions,
     message_id: int,
     folder: str,
-    output_path: Path,
+    output_dir: Path,
+    replaced: set[Path],
 ) -> list[Path] | None:
     """Download and process email attachments.
 
@@ -624,9 +554,13 @@ def _process_attachments(
         return None
 
     console.print("[dim]Downloading attachments...[/dim]")
-    effective_attachment_dir = options.attachment_dir or output_path.parent
+    effective_attachment_dir = options.attachment_dir or output_dir
     attachments = _download_attachments_internal(
-        message_id, folder, effective_attachment_dir, verbose=options.verbose
+        message_id,
+        folder,
+        effective_attachment_dir,
+        verbose=options.verbose,
+        replaced=replaced,
     )
     if attachments:
         console.print(
@@ -659,24 +593,125 @@ def _format_content(
     return format_json(envelope, body, folder)
 
 
-def _handle_existing_file(output_path: Path, *, overwrite: bool) -> None:
-    """Handle existing file confirmation.
+def _open_output(output_path: Path, *, overwrite: bool) -> int:
+    """Open the output file for writing, asking before replacing a file.
+
+    Without ``overwrite`` the file is created with ``O_EXCL``, so the
+    existence check and the creation happen atomically.
+
+    Returns:
+        File descriptor open for writing
 
     Raises:
         typer.Exit: If user declines to overwrite
 
     """
-    if output_path.exists() and not overwrite:
-        console.print(f"[yellow]File already exists:[/yellow] {output_path}")
-        if not Confirm.ask("Overwrite?", default=False):
-            console.print("[dim]Aborted.[/dim]")
-            raise typer.Exit(0)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    if overwrite:
+        return os.open(output_path, flags, 0o644)
+    try:
+        return os.open(output_path, flags | os.O_EXCL, 0o644)
+    except FileExistsError:
+        with _PROMPT_LOCK:
+            console.print(f"[yellow]File already exists:[/yellow] {output_path}")
+            if not Confirm.ask("Overwrite?", default=False):
+                console.print("[dim]Aborted.[/dim]")
+                raise typer.Exit(0) from None
+    return os.open(output_path, flags, 0o644)
+
+
+def _write_output(output_path: Path, content: str, *, overwrite: bool) -> None:
+    """Write the formatted email as UTF-8 bytes straight to the output file."""
+    data = memoryview(content.encode("utf-8"))
+    fd = _open_output(output_path, overwrite=overwrite)
+    try:
+        while data:
+            data = data[os.write(fd, data) :]
+    finally:
+        os.close(fd)
+
+
+def _discard_attachments(attachments_future: Future, replaced: set[Path]) -> None:
+    """Cancel an attachment download, or delete its files once it finishes.
+
+    Used when the message itself could not be fetched, so that no
+    attachments are left behind without a saved email next to them.
+    Files in ``replaced`` existed before the download and are kept.
+    """
+    if attachments_future.cancel():
+        return
+    try:
+        attachments = attachments_future.result()
+    except (typer.Exit, OSError):
+        return
+    for path in attachments or ():
+        if path not in replaced:
+            path.unlink(missing_ok=True)
+
+
+def _save_message(
+    options: SaveOptions, output_dir: Path, output_file: Path | None
+) -> None:
+    """Fetch, format and write a single email."""
+    message_id = options.message_id
+    folder = options.folder
+    output_format = options.output_format
+    verbose = options.verbose
+
+    # Download attachments in a worker thread while the message is fetched;
+    # both are independent himalaya runs that mostly wait on IMAP.
+    replaced: set[Path] = set()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        attachments_future = executor.submit(
+            _process_attachments, options, message_id, folder, output_dir, replaced
+        )
+
+        console.print(f"[dim]Fetching message {message_id} from {folder}...[/dim]")
+        try:
+            message_data = get_message(message_id, folder, verbose=verbose)
+        except BaseException:
+            _discard_attachments(attachments_future, replaced)
+            raise
+
+        envelope = message_data["envelope"]
+        body = message_data["body"]
+
+        subject = envelope.get("subject", "")
+        date = envelope["date"]
+        filename = generate_filename(
+            message_id, subject, date, output_format, date_prefix=options.date_prefix
+        )
+        output_path = output_file or output_dir / filename
+
+        attachments = attachments_future.result()
+
+    if attachments:
+        email_output_dir = output_path.parent
+        body = fix_attachment_paths_in_body(
+            body, attachments, email_output_dir, verbose=verbose
+        )
+
+    content = _format_content(options, envelope, body, folder, attachments)
+
+    _write_output(output_path, content, overwrite=options.overwrite)
+    console.print(
+        Panel(
+            f"[green]✓[/green] Saved to [cyan]{output_path}[/cyan]\n\n"
+            f"[dim]Format:[/dim] {output_format}\n"
+            f"[dim]Subject:[/dim] {subject}\n"
+            f"[dim]From:[/dim] {envelope['from'].get('address', '')}",
+            title="Email Saved",
+            border_style="green",
+        )
+    )
 
 
 # ruff: disable[FBT002]
 @app.command()
 def save(  # noqa: PLR0913, PLR0917
-    message_id: Annotated[int, typer.Argument(..., help="Message ID to save")],
+    message_ids: Annotated[
+        list[int], typer.Argument(..., help="Message ID(s) to save")
+    ],
     folder: Annotated[
         str, typer.Option("--folder", "-f", help="Folder to search")
     ] = "INBOX",
@@ -714,57 +749,74 @@ def save(  # noqa: PLR0913, PLR0917
         typer.Option("--verbose", "-v", help="Show himalaya commands"),
     ] = False,
 ) -> None:
-    """Save an email to a file."""
-    options = SaveOptions(
-        message_id=message_id,
-        folder=folder,
-        output=output,
-        output_format=output_format,
-        overwrite=overwrite,
-        download_attachments=download_attachments,
-        attachment_dir=attachment_dir,
-        date_prefix=date_prefix,
-        verbose=verbose,
-    )
-
-    console.print(f"[dim]Fetching message {message_id} from {folder}...[/dim]")
-    message_data = get_message(message_id, folder, verbose=verbose)
-
-    envelope = message_data["envelope"]
-    body = message_data["body"]
-
-    subject = envelope.get("subject", "")
-    date = envelope["date"]
-    filename = generate_filename(
-        message_id, subject, date, output_format, date_prefix=date_prefix
-    )
+    """Save one or more emails to files.
 
-    output_path = _determine_output_path(output, filename)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    attachments = _process_attachments(options, message_id, folder, output_path)
-
-    if attachments:
-        email_output_dir = output_path.parent
-        body = fix_attachment_paths_in_body(
-            body, attachments, email_output_dir, verbose=verbose
+    Several message IDs are saved concurrently and need a directory as
+    ``--output``.
+    """
+    output_dir, output_file = _resolve_output(output)
+    if output_file is not None and len(message_ids) > 1:
+        console.print(
+            "[red]Error:[/red] --output must be a directory "
+            "when saving several messages"
         )
+        raise typer.Exit(1)
 
-    content = _format_content(options, envelope, body, folder, attachments)
+    all_options = [
+        SaveOptions(
+            message_id=message_id,
+            folder=folder,
+            output=output,
+            output_format=output_format,
+            overwrite=overwrite,
+            download_attachments=download_attachments,
+            attachment_dir=attachment_dir,
+            date_prefix=date_prefix,
+            verbose=verbose,
+        )
+        for message_id in message_ids
+    ]
+    if len(all_options) == 1:
+        _save_message(all_options[0], output_dir, output_file)
+        return
+
+    # IMAP round trips dominate, and threads release the GIL while waiting
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_PARALLEL_SAVES, len(all_options))
+    ) as executor:
+        futures = [
+            executor.submit(_save_message, options, output_dir, None)
+            for options in all_options
+        ]
 
-    _handle_existing_file(output_path, overwrite=overwrite)
+    # Report every failed message instead of stopping at the first one
+    failed_ids = []
+    skipped_ids = []
+    for options, future in zip(all_options, futures, strict=True):
+        try:
+            future.result()
+        except typer.Exit as e:
+            # Exit(0) means the user declined to overwrite an existing file
+            if e.exit_code == 0:
+                skipped_ids.append(options.message_id)
+            else:
+                failed_ids.append(options.message_id)
+        except Exception as e:  # ruff: ignore[blind-except]
+            console.print(
+                f"[red]Error saving message {options.message_id}:[/red] {e!r}"
+            )
+            failed_ids.append(options.message_id)
 
-    output_path.write_text(content, encoding="utf-8")
-    console.print(
-        Panel(
-            f"[green]✓[/green] Saved to [cyan]{output_path}[/cyan]\n\n"
-            f"[dim]Format:[/dim] {output_format}\n"
-            f"[dim]Subject:[/dim] {subject}\n"
-            f"[dim]From:[/dim] {envelope['from'].get('address', '')}",
-            title="Email Saved",
-            border_style="green",
+    if skipped_ids:
+        console.print(
+            f"[dim]Skipped message(s): {', '.join(map(str, skipped_ids))}[/dim]"
         )
-    )
+    if failed_ids:
+        console.print(
+            f"[red]Error:[/red] {len(failed_ids)} of {len(all_options)} "
+            f"message(s) not saved: {', '.join(map(str, failed_ids))}"
+        )
+        raise typer.Exit(1)
 
 
 # ruff: enable[FBT002]
@@ -10,16 +10,24 @@
 
 import sys
 from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
 
 # Add parent scripts directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
 
 
+def _fake_run_himalaya(stdout: bytes) -> MagicMock:
+    """Return a stand-in for ``run_himalaya`` whose runs print ``stdout``."""
+    return MagicMock(return_value=MagicMock(stdout=stdout, stderr=b""))
+
+
 def test_parse_email_headers_with_date() -> None:
     """Test parsing headers when Date header is present."""
     from textwrap import dedent
 
-    from email_save import parse_email_headers
+    from email_common import parse_email_headers
 
     message_text = dedent(
         """\
@@ -41,7 +49,7 @@ def test_parse_email_headers_without_date() -> None:
     """Test parsing headers when Date header is missing (the problematic case)."""
     from textwrap import dedent
 
-    from email_save import parse_email_headers
+    from email_common import parse_email_headers
 
     message_text = dedent(
         """\
@@ -58,6 +66,34 @@ def test_parse_email_headers_without_date() -> None:
     assert headers.get("subject") == "Missing Date Header"
 
 
+def test_parse_message_splits_headers_and_body() -> None:
+    """Test that parse_message returns headers and the stripped body together."""
+    from email_common import parse_message
+
+    message_text = (
+        "From: sender@example.com\nSubject: Test Subject\n\nFirst line\nSecond line\n"
+    )
+
+    headers, body = parse_message(message_text)
+    assert headers == {"from": "sender@example.com", "subject": "Test Subject"}
+    assert body == "First line\nSecond line"
+
+
+def test_parse_email_address_shapes() -> None:
+    """Test that bracketed addresses always report a name, even an empty one."""
+    from email_common import parse_email_address
+
+    assert parse_email_address("Jane Doe <jane@example.com>") == {
+        "name": "Jane Doe",
+        "address": "jane@example.com",
+    }
+    assert parse_email_address("<jane@example.com>") == {
+        "name": "",
+        "address": "jane@example.com",
+    }
+    assert parse_email_address("jane@example.com") == {"address": "jane@example.com"}
+
+
 def test_generate_filename_with_date_prefix_iso8601_with_tz() -> None:
     """Test filename generation with ISO 8601 date format with timezone."""
     from email_save import generate_filename
@@ -295,7 +331,7 @@ def test_parse_email_headers_missing_date_is_failure_scenario() -> None:
     header is completely missing from the message body. In this case, the code
     must fall back to the envelope date fetching mechanism.
     """
-    from email_save import parse_email_headers
+    from email_common import parse_email_headers
 
     message_without_date = """From: Sender <sender@company.example>
 To: Recipient <recipient@company.example>
@@ -453,7 +489,172 @@ def test_fix_attachment_paths_unmapped_attachment() -> None:
     assert 'filename="/home/user/Downloads/unmapped.png"' in updated_body
 
 
-if __name__ == "__main__":
-    import pytest
+def test_get_envelope_date_reuses_cached_envelopes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that envelope lists are cached and refetched for unknown IDs."""
+    import json
+
+    import email_save
+
+    monkeypatch.setattr(email_save, "ENVELOPE_CACHE_DIR", tmp_path)
+    envelopes = [{"id": "57039", "date": "2026-01-15 10:23+00:00"}]
+    run_himalaya = _fake_run_himalaya(json.dumps(envelopes).encode())
+    monkeypatch.setattr(email_save, "run_himalaya", run_himalaya)
+
+    for _ in range(2):
+        date = email_save.get_envelope_date(57039, "INBOX", "sender@example.com")
+        assert date == "2026-01-15 10:23+00:00"
+    assert run_himalaya.call_count == 1
+
+    assert not email_save.get_envelope_date(1, "INBOX", "sender@example.com")
+    assert run_himalaya.call_count == 2
+
+
+def test_get_message_exits_on_empty_output(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that empty himalaya output is reported instead of parsed."""
+    import email_save
+    import typer
+
+    monkeypatch.setattr(email_save, "run_himalaya", _fake_run_himalaya(b"\n"))
+
+    with pytest.raises(typer.Exit):
+        email_save.get_message(57039, "INBOX")
+
+
+def test_format_text_keeps_headers_flush_left_with_multiline_body() -> None:
+    """Test that a multi-line body does not leave the headers indented."""
+    from email_save import format_text
 
+    envelope = {
+        "from": {"name": "Sender", "address": "sender@example.com"},
+        "to": {"address": "recipient@example.com"},
+        "date": "Wed, 15 Jan 2026 10:23:00 +0000",
+        "subject": "Test Subject",
+        "id": "42",
+    }
+
+    content = format_text(envelope, "First line\nSecond line", "INBOX")
+
+    assert content == (
+        "From: Sender <sender@example.com>\n"
+        "To: recipient@example.com\n"
+        "Date: Wed, 15 Jan 2026 10:23:00 +0000\n"
+        "Subject: Test Subject\n"
+        "\n"
+        "First line\n"
+        "Second line\n"
+        "\n"
+        "---\n"
+        "Saved from: INBOX (ID: 42)\n"
+    )
+
+
+def test_save_keeps_existing_file_when_overwrite_declined(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that an existing file is only replaced after confirmation."""
+    import email_save
+    import typer
+
+    envelope = {
+        "subject": "Test Subject",
+        "date": "2026-01-15 10:23+00:00",
+        "from": {"address": "sender@example.com"},
+        "to": {"address": "recipient@example.com"},
+    }
+    get_message = MagicMock(return_value={"envelope": envelope, "body": "Kiitos 🙂"})
+    monkeypatch.setattr(email_save, "get_message", get_message)
+    output_path = tmp_path / "message.md"
+
+    def save(*, overwrite: bool) -> None:
+        email_save.save(
+            message_ids=[57039],
+            output=output_path,
+            overwrite=overwrite,
+            download_attachments=False,
+        )
+
+    save(overwrite=False)
+    original = output_path.read_text(encoding="utf-8")
+    assert "Kiitos 🙂" in original
+
+    get_message.return_value = {"envelope": envelope, "body": "replaced"}
+    monkeypatch.setattr(email_save.Confirm, "ask", MagicMock(return_value=False))
+    with pytest.raises(typer.Exit) as exc_info:
+        save(overwrite=False)
+    assert exc_info.value.exit_code == 0
+    assert output_path.read_text(encoding="utf-8") == original
+
+    save(overwrite=True)
+    assert "replaced" in output_path.read_text(encoding="utf-8")
+
+
+def test_save_removes_attachments_when_fetch_fails(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that attachments are not left behind when the message is missing."""
+    from unittest.mock import MagicMock
+
+    import email_save
+    import typer
+
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+    (downloads / "report.pdf").write_bytes(b"%PDF")
+    (downloads / "notes.txt").write_text("attached notes")
+    output_dir = tmp_path / "saved"
+    output_dir.mkdir()
+    # A file of the user's that the download overwrites must not be deleted
+    (output_dir / "notes.txt").write_text("my notes")
+
+    himalaya_output = (
+        f'Downloading "{downloads / "report.pdf"}"…\n'
+        f'Downloading "{downloads / "notes.txt"}"…\n'
+    )
+    monkeypatch.setattr(
+        email_save,
+        "run_himalaya",
+        MagicMock(return_value=MagicMock(stdout=b"", stderr=himalaya_output.encode())),
+    )
+    monkeypatch.setattr(email_save, "get_message", MagicMock(side_effect=typer.Exit(1)))
+
+    with pytest.raises(typer.Exit):
+        email_save.save(message_ids=[57039], output=output_dir)
+    assert [path.name for path in output_dir.iterdir()] == ["notes.txt"]
+
+
+def test_save_reports_every_failed_message(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    """Test that one failed message does not hide the outcome of the others."""
+    import email_save
+    import typer
+
+    saved = []
+
+    def fake_save_message(options: email_save.SaveOptions, *_: object) -> None:
+        if options.message_id == 2:
+            raise typer.Exit(1)
+        if options.message_id == 3:
+            msg = "from"
+            raise KeyError(msg)
+        if options.message_id == 4:
+            # The user declined to overwrite an existing file
+            raise typer.Exit(0)
+        saved.append(options.message_id)
+
+    monkeypatch.setattr(email_save, "_save_message", fake_save_message)
+
+    with pytest.raises(typer.Exit) as exc_info:
+        email_save.save(message_ids=[1, 2, 3, 4, 5], output=tmp_path)
+    assert exc_info.value.exit_code == 1
+    assert sorted(saved) == [1, 5]
+    out = capsys.readouterr().out
+    assert "Error saving message 3:" in out
+    assert "Skipped message(s): 4" in out
+    assert "2 of 5 message(s) not saved: 2, 3" in out
+
+
+if __name__ == "__main__":
     pytest.main([__file__, "-v"])
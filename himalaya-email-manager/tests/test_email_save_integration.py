@@ -33,16 +33,16 @@ class TestDownloadAttachmentsInternal:
             moved_files.append((Path(src), Path(dst)))
 
         with (
-            patch("email_save.shutil.which", return_value="/usr/bin/himalaya"),
-            patch("email_save.subprocess.run") as mock_run,
+            patch("email_common.shutil.which", return_value="/usr/bin/himalaya"),
+            patch("email_common.subprocess.run") as mock_run,
             patch("email_save.shutil.move", side_effect=mock_move),
             patch("pathlib.Path.mkdir"),
         ):
             mock_run.return_value = subprocess.CompletedProcess(
                 args=["himalaya"],
                 returncode=0,
-                stdout="",
-                stderr=himalaya_output,
+                stdout=b"",
+                stderr=himalaya_output.encode(),
             )
 
             result = _download_attachments_internal(
@@ -74,16 +74,16 @@ class TestDownloadAttachmentsInternal:
             moved_files.append((Path(src), Path(dst)))
 
         with (
-            patch("email_save.shutil.which", return_value="/usr/bin/himalaya"),
-            patch("email_save.subprocess.run") as mock_run,
+            patch("email_common.shutil.which", return_value="/usr/bin/himalaya"),
+            patch("email_common.subprocess.run") as mock_run,
             patch("email_save.shutil.move", side_effect=mock_move),
             patch("pathlib.Path.mkdir"),
         ):
             mock_run.return_value = subprocess.CompletedProcess(
                 args=["himalaya"],
                 returncode=0,
-                stdout="",
-                stderr=himalaya_output,
+                stdout=b"",
+                stderr=himalaya_output.encode(),
             )
 
             result = _download_attachments_internal(
@@ -102,15 +102,15 @@ class TestDownloadAttachmentsInternal:
         himalaya_output = ""
 
         with (
-            patch("email_save.shutil.which", return_value="/usr/bin/himalaya"),
-            patch("email_save.subprocess.run") as mock_run,
+            patch("email_common.shutil.which", return_value="/usr/bin/himalaya"),
+            patch("email_common.subprocess.run") as mock_run,
             patch("email_save.shutil.move") as mock_move,
         ):
             mock_run.return_value = subprocess.CompletedProcess(
                 args=["himalaya"],
                 returncode=0,
-                stdout="",
-                stderr=himalaya_output,
+                stdout=b"",
+                stderr=himalaya_output.encode(),
             )
 
             result = _download_attachments_internal(
@@ -129,8 +129,8 @@ class TestDownloadAttachmentsInternal:
         himalaya_output = 'Downloading "obf_file.png"…\n'
 
         with (
-            patch("email_save.shutil.which", return_value="/usr/bin/himalaya"),
-            patch("email_save.subprocess.run") as mock_run,
+            patch("email_common.shutil.which", return_value="/usr/bin/himalaya"),
+            patch("email_common.subprocess.run") as mock_run,
             patch("email_save.shutil.move"),
             patch.object(Path, "mkdir") as mock_mkdir,
             patch.object(Path, "exists", return_value=False),
@@ -138,8 +138,8 @@ class TestDownloadAttachmentsInternal:
             mock_run.return_value = subprocess.CompletedProcess(
                 args=["himalaya"],
                 returncode=0,
-                stdout="",
-                stderr=himalaya_output,
+                stdout=b"",
+                stderr=himalaya_output.encode(),
             )
 
             _download_attachments_internal(
@@ -164,16 +164,16 @@ class TestDownloadAttachmentsInternal:
             moved_files.append((Path(src), Path(dst)))
 
         with (
-            patch("email_save.shutil.which", return_value="/usr/bin/himalaya"),
-            patch("email_save.subprocess.run") as mock_run,
+            patch("email_common.shutil.which", return_value="/usr/bin/himalaya"),
+            patch("email_common.subprocess.run") as mock_run,
             patch("email_save.shutil.move", side_effect=mock_move),
             patch("pathlib.Path.mkdir"),
         ):
             mock_run.return_value = subprocess.CompletedProcess(
                 args=["himalaya"],
                 returncode=0,
-                stdout="",
-                stderr=himalaya_output,
+                stdout=b"",
+                stderr=himalaya_output.encode(),
             )
 
             result = _download_attachments_internal(
@@ -211,7 +211,9 @@ class TestSaveCommandAttachmentBehavior:
 
         captured_attachment_dir = None
 
-        def capture_download_attachments(msg_id, folder, attach_dir, verbose):
+        def capture_download_attachments(
+            _msg_id: int, _folder: str, attach_dir: Path | None, **_kwargs: object
+        ) -> list[Path]:
             nonlocal captured_attachment_dir
             captured_attachment_dir = attach_dir
             return downloaded_attachments
@@ -224,7 +226,7 @@ class TestSaveCommandAttachmentBehavior:
             ),
             patch("email_save.generate_filename", return_value="57039.md"),
             patch("pathlib.Path.exists", return_value=False),
-            patch("pathlib.Path.write_text"),
+            patch("email_save._write_output"),
             patch("email_save.console"),
         ):
             mock_get_message.return_value = {
@@ -233,7 +235,7 @@ class TestSaveCommandAttachmentBehavior:
             }
 
             save(
-                message_id=57039,
+                message_ids=[57039],
                 folder=test_folder,
                 output=None,
                 output_format="markdown",
@@ -260,7 +262,9 @@ class TestSaveCommandAttachmentBehavior:
 
         captured_attachment_dir = None
 
-        def capture_download_attachments(msg_id, folder, attach_dir, verbose):
+        def capture_download_attachments(
+            _msg_id: int, _folder: str, attach_dir: Path | None, **_kwargs: object
+        ) -> list[Path]:
             nonlocal captured_attachment_dir
             captured_attachment_dir = attach_dir
             return [Path("obf_file.txt")]
@@ -273,7 +277,7 @@ class TestSaveCommandAttachmentBehavior:
             ),
             patch("email_save.generate_filename", return_value="12345.md"),
             patch("pathlib.Path.exists", return_value=False),
-            patch("pathlib.Path.write_text"),
+            patch("email_save._write_output"),
             patch("email_save.console"),
         ):
             mock_get_message.return_value = {
@@ -282,7 +286,7 @@ class TestSaveCommandAttachmentBehavior:
             }
 
             save(
-                message_id=12345,
+                message_ids=[12345],
                 folder="INBOX",
                 output=None,
                 output_format="markdown",
@@ -311,7 +315,7 @@ class TestSaveCommandAttachmentBehavior:
             patch("email_save._download_attachments_internal") as mock_download,
             patch("email_save.generate_filename", return_value="12345.md"),
             patch("pathlib.Path.exists", return_value=False),
-            patch("pathlib.Path.write_text"),
+            patch("email_save._write_output"),
             patch("email_save.console"),
         ):
             mock_get_message.return_value = {
@@ -320,7 +324,7 @@ class TestSaveCommandAttachmentBehavior:
             }
 
             save(
-                message_id=12345,
+                message_ids=[12345],
                 folder="INBOX",
                 output=None,
                 output_format="markdown",
@@ -356,7 +360,9 @@ class TestSaveCommandAttachmentBehavior:
 
         captured_attachment_dir = None
 
-        def capture_download_attachments(msg_id, folder, attach_dir, verbose):
+        def capture_download_attachments(
+            _msg_id: int, _folder: str, attach_dir: Path | None, **_kwargs: object
+        ) -> list[Path]:
             nonlocal captured_attachment_dir
             captured_attachment_dir = attach_dir
             return downloaded_attachments
@@ -369,7 +375,7 @@ class TestSaveCommandAttachmentBehavior:
             ),
             patch("email_save.generate_filename", return_value="57039.md"),
             patch("pathlib.Path.exists", return_value=False),
-            patch("pathlib.Path.write_text"),
+            patch("email_save._write_output"),
             patch("email_save.console"),
         ):
             mock_get_message.return_value = {
@@ -378,7 +384,7 @@ class TestSaveCommandAttachmentBehavior:
             }
 
             save(
-                message_id=57039,
+                message_ids=[57039],
                 folder="INBOX",
                 output=output_dir,
                 output_format="markdown",
@@ -410,7 +416,7 @@ class TestSaveCommandAttachmentBehavior:
             ),
             patch("email_save.generate_filename", return_value="12345.md"),
             patch("pathlib.Path.exists", return_value=False),
-            patch.object(Path, "write_text") as mock_write,
+            patch("email_save._write_output") as mock_write,
             patch("email_save.console"),
         ):
             mock_get_message.return_value = {
@@ -419,7 +425,7 @@ class TestSaveCommandAttachmentBehavior:
             }
 
             save(
-                message_id=12345,
+                message_ids=[12345],
                 folder="INBOX",
                 output=None,
                 output_format="markdown",
@@ -431,7 +437,7 @@ class TestSaveCommandAttachmentBehavior:
             )
 
             call_args = mock_write.call_args
-            written_content = call_args[0][0]
+            written_content = call_args[0][1]
             assert "obf_img_001.png" in written_content
             assert "obf_doc.pdf" in written_content
             assert "Attachments:" in written_content